@@ -0,0 +1,145 @@
+"""
+Load test post creation against a slow stub Flickr: the sync views under
+gunicorn's threaded WSGI worker versus posts.async_views under uvicorn.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_asgi \
+        [--requests 400] [--concurrency 64] [--threads 8] [--delay 1.0]
+
+Needs httpx, uvicorn and gunicorn installed. Both servers run one process
+against the same database and the same connection limits to the stub, so
+the difference is what a request holds while Flickr answers.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.stub_server import StubServer
+
+SERVERS = {
+    "WSGI (gunicorn gthread)": lambda port, threads: [
+        "gunicorn", "core.wsgi:application", "--worker-class", "gthread",
+        "--workers", "1", "--threads", str(threads), "--bind", f"127.0.0.1:{port}",
+    ],
+    "ASGI (uvicorn, async views)": lambda port, threads: [
+        "uvicorn", "core.asgi:application", "--port", str(port), "--log-level", "warning",
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def load_test_tag():
+    import django
+
+    django.setup()
+    from posts.models import Tag
+
+    tag, _ = Tag.objects.get_or_create(slug="load-test", defaults={"name": "Load test"})
+    return tag.id
+
+
+async def load(base, upstream, total, concurrency, run, tag_id):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+        await client.get("/post/create/")
+        token = client.cookies["csrftoken"]
+        queue = iter(range(total))
+        latencies, errors = [], 0
+
+        async def worker():
+            nonlocal errors
+            for i in queue:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/post/create/",
+                    data={
+                        "url": f"{upstream}/photos/{run}-{i}/",
+                        "body": "load test",
+                        "tags": [tag_id],
+                    },
+                    headers={"X-CSRFToken": token},
+                )
+                latencies.append(time.perf_counter() - start)
+                # A created post redirects home, anything else is a failure
+                if response.status_code != 302:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+    parser.add_argument("--delay", type=float, default=1.0, help="Stub Flickr latency")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "benchmarks.load_settings",
+        "POSTS_LOAD_CONNECTIONS": str(args.concurrency),
+        # Persistent connections pile up under ASGI, compare like with like
+        "DATABASE_CONNECTIONS": os.environ.get("DATABASE_CONNECTIONS", "off"),
+    }
+    subprocess.run([sys.executable, "manage.py", "migrate", "-v0"], env=env, check=True)
+    os.environ.update(env)
+    tag_id = load_test_tag()
+
+    with StubServer(delay=args.delay) as upstream:
+        print(
+            f"{args.requests} creates, {args.concurrency} concurrent, "
+            f"Flickr stub answering in {args.delay * 1000:.0f} ms"
+        )
+        for run, (name, command) in enumerate(SERVERS.items()):
+            port = free_port()
+            run_id = f"{run}-{time.time_ns()}"  # fresh URLs, so the scrape cache misses
+            server_env = {**env, "POSTS_ASYNC_VIEWS": "1" if "ASGI" in name else "0"}
+            server = subprocess.Popen(
+                command(port, args.threads), env=server_env, stderr=subprocess.DEVNULL
+            )
+            try:
+                base = f"http://localhost:{port}"
+                wait_for(f"{base}/post/create/")
+                elapsed, latencies, errors = asyncio.run(
+                    load(base, upstream.url, args.requests, args.concurrency, run_id, tag_id)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            latencies.sort()
+            print(
+                f"{name:28} {args.requests / elapsed:7.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:6.0f} ms  "
+                f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.0f} ms  "
+                f"{errors} errors"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Feed requests/sec with each DATABASE_CONNECTIONS mode: a new connection
+per request, persistent connections per thread, and a psycopg_pool pool.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_db_pool \
+        [--requests 2000] [--concurrency 16] [--threads 8]
+
+Needs httpx, gunicorn and psycopg[pool] installed. Seeds a page of posts
+if the database has none, so point it at a scratch database.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_asgi import free_port, wait_for
+
+MODES = ("off", "persistent", "pool")
+
+
+def seed_posts(count=20):
+    import django
+
+    django.setup()
+    from posts.models import Post
+
+    if not Post.objects.exists():
+        Post.objects.bulk_create(
+            Post(title=f"Post {i}", image="https://live.staticflickr.com/1/2_3_b.jpg", body="bench")
+            for i in range(count)
+        )
+
+
+async def load(base, total, concurrency):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        queue = iter(range(total))
+        latencies, errors = [], 0
+
+        async def worker():
+            nonlocal errors
+            for _ in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.get("/")
+                except httpx.TransportError:  # gunicorn closing a keep-alive connection
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+    args = parser.parse_args()
+
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "benchmarks.load_settings"}
+    subprocess.run([sys.executable, "manage.py", "migrate", "-v0"], env=env, check=True)
+    os.environ.update(env)
+    seed_posts()
+
+    print(f"{args.requests} feed requests, {args.concurrency} concurrent, {args.threads} threads")
+    for mode in MODES:
+        port = free_port()
+        server = subprocess.Popen(
+            [
+                "gunicorn", "core.wsgi:application", "--worker-class", "gthread",
+                "--workers", "1", "--threads", str(args.threads), "--bind", f"127.0.0.1:{port}",
+            ],
+            env={**env, "DATABASE_CONNECTIONS": mode},
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base = f"http://localhost:{port}"
+            wait_for(f"{base}/")
+            asyncio.run(load(base, args.threads * 4, args.threads))  # warm up
+            elapsed, latencies, errors = asyncio.run(
+                load(base, args.requests, args.concurrency)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        latencies.sort()
+        print(
+            f"{mode:12} {args.requests / elapsed:7.1f} req/s  "
+            f"p50 {statistics.median(latencies) * 1000:6.1f} ms  "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.1f} ms  "
+            f"{errors} errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
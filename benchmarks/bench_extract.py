@@ -0,0 +1,98 @@
+"""
+Compare the streaming FlickrPageParser with the full BeautifulSoup parse
+post_create_view used to do, on time and peak memory per page.
+
+    python -m benchmarks.bench_extract [page.html ...]
+
+Pass pages saved from Flickr (browser "Save page as", HTML only) to run on
+real markup. Without arguments a synthetic page shaped like a Flickr photo
+page is used: a heavy <head>, the photo block, then a long photostream and
+comment thread the scraper never needs.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from posts.scraper import extract_post_data
+
+CHUNK_SIZE = 16 * 1024
+
+
+def synthetic_page():
+    head = "".join(
+        f'<script src="https://combo.staticflickr.com/{i}.js"></script>\n'
+        f'<meta name="x-{i}" content="{"x" * 200}">\n'
+        for i in range(200)
+    )
+    photostream = "".join(
+        f'<div class="photo-list-photo-view"><a href="/photos/stub/{i}/">'
+        f'<img src="https://live.staticflickr.com/65535/{i}_n.jpg"></a></div>\n'
+        for i in range(2000)
+    )
+    comments = "".join(
+        f'<div class="comment"><a class="comment-author">user{i}</a>'
+        f"<p>{'Lovely light on this one. ' * 10}</p></div>\n"
+        for i in range(1000)
+    )
+    return f"""<!DOCTYPE html><html><head>
+<meta property="og:image" content="https://live.staticflickr.com/65535/49909538937_3255dcf9e7_b.jpg">
+{head}</head><body>
+<div class="photo-title-desc"><h1 class="photo-title">Evening over the lake</h1></div>
+<div class="attribution"><a class="owner-name" href="/photos/stub/">Jane Doe</a></div>
+{photostream}{comments}</body></html>"""
+
+
+def soup_extract(raw):
+    sourcecode = BeautifulSoup(raw.decode(), "html.parser")
+    image = sourcecode.select('meta[content^="https://live.staticflickr.com/"]')
+    title = sourcecode.select("h1.photo-title")
+    artist = sourcecode.select("a.owner-name")
+    return {
+        "image": image[0]["content"],
+        "title": title[0].text.strip() if title else "Untitled",
+        "artist": artist[0].text.strip() if artist else "Unknown",
+    }
+
+
+def stream_extract(raw):
+    chunks = (raw[i : i + CHUNK_SIZE] for i in range(0, len(raw), CHUNK_SIZE))
+    return extract_post_data(chunks, "utf-8")
+
+
+def measure(extract, raw, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = extract(raw)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    extract(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pages", nargs="*", help="saved Flickr photo pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = [(path, open(path, "rb").read()) for path in args.pages]
+    pages = pages or [("synthetic", synthetic_page().encode())]
+
+    for name, raw in pages:
+        print(f"{name}: {len(raw) / 1024:.0f} KiB")
+        expected = None
+        for label, extract in [("BeautifulSoup", soup_extract), ("streaming", stream_extract)]:
+            result, elapsed, peak = measure(extract, raw, args.repeat)
+            print(f"  {label:14} {elapsed * 1000:8.2f} ms  {peak / 1024:8.0f} KiB peak")
+            expected = expected or result
+            assert result == expected, f"{label} disagrees: {result} != {expected}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Post primary key as varchar(100) holding a dashed uuid4 (before migration
+0010) versus Django's native UUIDField column (uuid on Postgres, char(32)
+elsewhere), on the lookups and joins the post page and category feed do.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_pk_join [--posts 100000]
+
+Works in scratch tables named bench_pk_*, dropped again afterwards.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+TAGS = 10
+
+
+def variants(vendor):
+    native = "uuid" if vendor == "postgresql" else "char(32)"
+    return [
+        ("varchar(100)", "varchar(100)", str),
+        (native, native, (lambda u: u) if vendor == "postgresql" else (lambda u: u.hex)),
+    ]
+
+
+def timed(cursor, sql, params_list):
+    times = []
+    for params in params_list:
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run_variant(cursor, vendor, label, column_type, to_db, count):
+    serial = "bigserial" if vendor == "postgresql" else "integer"
+    cursor.execute("DROP TABLE IF EXISTS bench_pk_post_tags")
+    cursor.execute("DROP TABLE IF EXISTS bench_pk_post")
+    cursor.execute(
+        f"CREATE TABLE bench_pk_post (id {column_type} PRIMARY KEY, "
+        "created timestamp NOT NULL, title varchar(100) NOT NULL)"
+    )
+    cursor.execute(
+        f"CREATE TABLE bench_pk_post_tags (id {serial} PRIMARY KEY, "
+        f"post_id {column_type} NOT NULL REFERENCES bench_pk_post (id), tag_id integer NOT NULL, "
+        "UNIQUE (post_id, tag_id))"
+    )
+    cursor.execute("CREATE INDEX bench_pk_post_tags_post ON bench_pk_post_tags (post_id)")
+    cursor.execute("CREATE INDEX bench_pk_post_tags_tag ON bench_pk_post_tags (tag_id)")
+
+    rng = random.Random(42)
+    ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(count)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    cursor.executemany(
+        "INSERT INTO bench_pk_post (id, created, title) VALUES (%s, %s, %s)",
+        [(to_db(i), start + timedelta(minutes=n), "photo") for n, i in enumerate(ids)],
+    )
+    cursor.executemany(
+        "INSERT INTO bench_pk_post_tags (post_id, tag_id) VALUES (%s, %s)",
+        [(to_db(i), tag) for i in ids for tag in rng.sample(range(TAGS), 2)],
+    )
+    if vendor == "postgresql":
+        cursor.execute("ANALYZE bench_pk_post")
+        cursor.execute("ANALYZE bench_pk_post_tags")
+
+    lookups = [(to_db(i),) for i in rng.sample(ids, 500)]
+    pk = timed(cursor, "SELECT * FROM bench_pk_post WHERE id = %s", lookups)
+    feed = timed(
+        cursor,
+        "SELECT p.* FROM bench_pk_post p JOIN bench_pk_post_tags t ON t.post_id = p.id "
+        "WHERE t.tag_id = %s ORDER BY p.created DESC LIMIT 10",
+        [(tag,) for tag in range(TAGS)] * 5,
+    )
+    join = timed(
+        cursor,
+        "SELECT count(*) FROM bench_pk_post p JOIN bench_pk_post_tags t ON t.post_id = p.id "
+        "WHERE t.tag_id = %s",
+        [(tag,) for tag in range(TAGS)],
+    )
+
+    size = ""
+    if vendor == "postgresql":
+        cursor.execute(
+            "SELECT pg_total_relation_size('bench_pk_post') + pg_total_relation_size('bench_pk_post_tags')"
+        )
+        size = f"  {cursor.fetchone()[0] / 2**20:7.1f} MiB"
+    print(
+        f"{label:14} pk lookup {pk:7.3f} ms  category page {feed:8.3f} ms  "
+        f"full tag join {join:8.2f} ms{size}"
+    )
+
+    cursor.execute("DROP TABLE bench_pk_post_tags")
+    cursor.execute("DROP TABLE bench_pk_post")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+
+    django.setup()
+    from django.db import connection, transaction
+
+    print(f"{connection.vendor}, {args.posts} posts, 2 of {TAGS} tags each (median times)")
+    for label, column_type, to_db in variants(connection.vendor):
+        with transaction.atomic(), connection.cursor() as cursor:
+            run_variant(cursor, connection.vendor, label, column_type, to_db, args.posts)
+
+
+if __name__ == "__main__":
+    main()
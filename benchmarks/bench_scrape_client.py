@@ -0,0 +1,47 @@
+"""
+Compare the pooled ScrapeClient with a fresh requests.get per call, the way
+post_create_view used to fetch pages.
+
+    python -m benchmarks.bench_scrape_client [--requests 500] [--threads 8]
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from posts.scrape_client import ScrapeClient
+
+
+def run(fetch, url, total, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for response in pool.map(lambda i: fetch(f"{url}/photos/{i}/"), range(total)):
+            response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    client = ScrapeClient(pool_size=args.threads, per_host_limit=args.threads)
+    modes = [
+        ("requests.get per call", lambda url: requests.get(url, timeout=5)),
+        ("pooled ScrapeClient", lambda url: client.get(url, timeout=5)),
+    ]
+    for name, fetch in modes:
+        with StubServer() as server:
+            elapsed = run(fetch, server.url, args.requests, args.threads)
+            print(
+                f"{name:24} {args.requests / elapsed:8.0f} req/s  "
+                f"{server.connections:5} connections for {server.requests} requests"
+            )
+
+
+if __name__ == "__main__":
+    main()
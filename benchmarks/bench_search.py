@@ -0,0 +1,130 @@
+"""
+Search over synthetic posts.
+
+    python -m benchmarks.bench_search [--posts 100000]
+
+By default this times the in-process InvertedIndex (the SQLite fallback)
+against a plain substring scan, without touching a database.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_search --db --seed
+
+--db runs search_posts() through Django against DATABASE_URL instead, which
+exercises the tsvector/GIN path on Postgres. --seed first bulk inserts the
+synthetic posts there, so point it at a scratch database.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+# Captions follow a Zipf curve: a few words are everywhere, most are rare
+WORDS = (
+    "the a of light lake heron sunset mountain street night city portrait dog "
+    "cat forest river bridge rain snow winter summer beach harbour boat market "
+    "train station tower cathedral garden flower macro bird eagle fox deer moss"
+).split() + [f"word{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+ARTISTS = [f"{first} {last}" for first in ("Ana", "Ben", "Cleo", "Dev") for last in ("Ito", "Moss", "Park")]
+QUERIES = ["heron", "sunset lake", "night city street", "fox", "cathedral tower rain"]
+
+
+def synthetic_posts(count, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        yield {
+            "id": f"{i:032x}",
+            "created": start + timedelta(minutes=i),
+            "title": " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=3)).title(),
+            "artist": rng.choice(ARTISTS),
+            "body": " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=12)),
+        }
+
+
+def timed(func, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return result, statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def bench_in_process(count):
+    from posts.search import InvertedIndex, tokenize
+
+    docs = list(synthetic_posts(count))
+
+    start = time.perf_counter()
+    index = InvertedIndex()
+    for doc in docs:
+        index.add(doc["id"], doc["created"], title=doc["title"], artist=doc["artist"], body=doc["body"])
+    print(f"indexed {count} posts in {time.perf_counter() - start:.2f}s")
+
+    def scan(query):
+        terms = tokenize(query)
+        return [
+            doc["id"]
+            for doc in docs
+            if all(term in f"{doc['title']} {doc['artist']} {doc['body']}".lower() for term in terms)
+        ]
+
+    for query in QUERIES:
+        hits, p50, p95 = timed(lambda: index.search(query, limit=11))
+        hits = index.search(query)
+        _, scan_p50, _ = timed(lambda: scan(query), repeat=3)
+        print(
+            f"{query!r:26} {len(hits):6} hits  index p50 {p50 * 1000:7.2f} ms "
+            f"p95 {p95 * 1000:7.2f} ms   scan p50 {scan_p50 * 1000:8.2f} ms"
+        )
+
+
+def bench_db(count, seed):
+    from django.db import connection
+
+    from posts.models import Post
+    from posts.search import search_posts
+
+    if seed:
+        start = time.perf_counter()
+        Post.objects.bulk_create(
+            (Post(image="https://example.com/image.jpg", **doc) for doc in synthetic_posts(count)),
+            batch_size=5000,
+        )
+        print(f"seeded {count} posts in {time.perf_counter() - start:.1f}s")
+
+    print(f"{connection.vendor}: {Post.objects.count()} posts")
+    for query in QUERIES:
+        (posts, cursor), p50, p95 = timed(lambda: search_posts(query))
+        _, next_p50, _ = timed(lambda: search_posts(query, cursor=cursor)) if cursor else (None, 0, 0)
+        print(
+            f"{query!r:26} first page p50 {p50 * 1000:7.2f} ms p95 {p95 * 1000:7.2f} ms"
+            f"   next page p50 {next_p50 * 1000:7.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--db", action="store_true", help="search through DATABASE_URL")
+    parser.add_argument("--seed", action="store_true", help="insert the posts first")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+
+    django.setup()
+
+    if args.db:
+        bench_db(args.posts, args.seed)
+    else:
+        bench_in_process(args.posts)
+
+
+if __name__ == "__main__":
+    main()
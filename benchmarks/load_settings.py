@@ -0,0 +1,13 @@
+"""Settings for benchmarks.bench_asgi, the app settings with load test limits"""
+
+import os
+
+from core.settings import *  # noqa: F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["localhost"]
+
+# Enough upstream connections that neither server waits on the scrape pool
+SCRAPE_POOL_SIZE = int(os.environ.get("POSTS_LOAD_CONNECTIONS", 64))
+SCRAPE_PER_HOST_LIMIT = SCRAPE_POOL_SIZE
+SCRAPE_CACHE = {"BACKEND": "local", "TTL": 60, "MAX_ENTRIES": 100_000}
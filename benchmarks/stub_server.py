@@ -0,0 +1,77 @@
+"""
+A local stand-in for Flickr used by the benchmarks. Speaks HTTP/1.1 so
+clients can keep connections alive, and counts how many it had to accept.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PHOTO_PAGE = """<!DOCTYPE html>
+<html><head>
+<meta property="og:image" content="https://live.staticflickr.com/65535/1_2_b.jpg">
+</head><body>
+<h1 class="photo-title">Stub photo</h1>
+<a class="owner-name" href="/photos/stub/">Stub Artist</a>
+</body></html>
+"""
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under concurrent load
+    request_queue_size = 256
+
+    def __init__(self, body=PHOTO_PAGE, delay=0):
+        self.body = body.encode() if isinstance(body, str) else body
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), StubHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes, don't let Nagle hold them
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._count_lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server._count_lock:
+            self.server.requests += 1
+        if self.server.delay:
+            threading.Event().wait(self.server.delay)
+
+        etag = '"stub-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
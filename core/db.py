@@ -0,0 +1,62 @@
+"""DATABASES entries: connection reuse (DATABASE_CONNECTIONS) and read replicas"""
+
+import importlib.util
+import re
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+CONNECTION_MODES = ("off", "persistent", "pool")
+
+
+def configure_connections(database, mode, pool_min_size, pool_max_size, pool_timeout, max_age):
+    """
+    The dj_database_url entry with connection reuse settings for `mode`:
+
+    - "off" connects for every request and closes at its end
+    - "persistent" keeps one connection per thread for max_age seconds,
+      checked before reuse
+    - "pool" shares a psycopg_pool pool per process (PostgreSQL only)
+    """
+    if mode not in CONNECTION_MODES:
+        raise ImproperlyConfigured(
+            f"Unknown connection mode {mode!r}, use one of {', '.join(CONNECTION_MODES)}"
+        )
+    database = {**database, "CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": mode != "off"}
+
+    if mode == "persistent":
+        database["CONN_MAX_AGE"] = max_age
+    elif mode == "pool":
+        if database["ENGINE"] != "django.db.backends.postgresql":
+            raise ImproperlyConfigured("Connection pooling needs PostgreSQL")
+        if importlib.util.find_spec("psycopg_pool") is None:
+            raise ImproperlyConfigured('Connection pooling needs pip install "psycopg[pool]"')
+        # Django checks pooled connections on checkout when
+        # CONN_HEALTH_CHECKS is on, and returns them at the end of a request
+        database["OPTIONS"] = {
+            **database.get("OPTIONS", {}),
+            "pool": {
+                "min_size": pool_min_size,
+                "max_size": pool_max_size,
+                "timeout": pool_timeout,
+            },
+        }
+    return database
+
+
+REPLICA_URL_RE = re.compile(r"^DATABASE_REPLICA_(\w+)_URL$")
+
+
+def replica_databases(environ, **connections):
+    """
+    A replica_<name> entry for every DATABASE_REPLICA_<NAME>_URL variable.
+    The test runner points them at the primary's test database.
+    """
+    replicas = {}
+    for variable in sorted(environ):
+        match = REPLICA_URL_RE.match(variable)
+        if match:
+            database = configure_connections(dj_database_url.parse(environ[variable]), **connections)
+            database["TEST"] = {"MIRROR": "default"}
+            replicas[f"replica_{match[1].lower()}"] = database
+    return replicas
@@ -21,22 +21,45 @@ from django.contrib import admin
 from django.urls import include, path
 
 from posts.views import (
+    api_feed_view,
+    api_post_view,
+    bulk_posts_view,
+    comment_create_view,
     home_view,
+    perf_stats_view,
     post_create_view,
     post_delete_view,
     post_edit_view,
+    post_image_view,
+    post_like_view,
     post_page_view,
+    post_status_view,
+    reply_create_view,
 )
 
+if settings.POSTS_ASYNC_VIEWS:
+    from posts.async_views import home_view, post_create_view, post_page_view
+
 urlpatterns = [
+    path("admin/perf/", perf_stats_view, name="perf-stats"),
     path("admin/", admin.site.urls),
     path("accounts/", include("allauth.urls")),
+    path("api/posts", api_feed_view, name="api-feed"),
+    path("api/category/<str:tag>", api_feed_view, name="api-category"),
+    path("api/post/<uuid:pk>", api_post_view, name="api-post"),
     path("", home_view, name="home"),
     path("category/<str:tag>", home_view, name="category"),
+    path("search/", home_view, name="search"),
     path("post/create/", post_create_view, name="post-create"),
     path("post/delete/<uuid:pk>", post_delete_view, name="post-delete"),
+    path("post/bulk", bulk_posts_view, name="post-bulk"),
     path("post/edit/<uuid:pk>", post_edit_view, name="post-edit"),
     path("post/<uuid:pk>", post_page_view, name="post"),
+    path("post/<uuid:pk>/status", post_status_view, name="post-status"),
+    path("post/<uuid:pk>/image/<str:variant>", post_image_view, name="post-image"),
+    path("post/<uuid:pk>/like", post_like_view, name="post-like"),
+    path("post/<uuid:pk>/comment", comment_create_view, name="comment-create"),
+    path("comment/<int:pk>/reply", reply_create_view, name="reply-create"),
 ]
 
 
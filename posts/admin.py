@@ -1,10 +1,48 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+
+from .bulk import bulk_add_tag, bulk_delete_posts, bulk_remove_tag
+from .models import Comment, Like, Post, Reply, Tag
+
+
+class PostActionForm(ActionForm):
+    tag = forms.ModelChoiceField(Tag.objects.all(), required=False, empty_label="Tag ...")
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    list_display = ["title", "artist", "created", "like_count", "comment_count"]
+    list_filter = ["tags"]
+    action_form = PostActionForm
+    actions = ["add_tag", "remove_tag"]
+
+    def delete_queryset(self, request, queryset):
+        # The "Delete selected" action, after its confirmation page
+        bulk_delete_posts(list(queryset.values_list("id", flat=True)))
+
+    def _retag(self, request, queryset, bulk_retag, done):
+        tag = Tag.objects.filter(pk=request.POST.get("tag") or None).first()
+        if tag is None:
+            self.message_user(request, "Pick a tag first.", messages.WARNING)
+            return
+        changed = bulk_retag(list(queryset.values_list("id", flat=True)), tag)
+        self.message_user(request, f"{changed} post(s) {done} {tag}.", messages.SUCCESS)
+
+    @admin.action(description="Add the tag to selected posts")
+    def add_tag(self, request, queryset):
+        self._retag(request, queryset, bulk_add_tag, "tagged")
+
+    @admin.action(description="Remove the tag from selected posts")
+    def remove_tag(self, request, queryset):
+        self._retag(request, queryset, bulk_remove_tag, "untagged")
 
-from .models import Post, Tag
 
-admin.site.register(Post)
 admin.site.register(Tag)
+admin.site.register(Like)
+admin.site.register(Comment)
+admin.site.register(Reply)
 
 #username admin
 #email admin@email.com
-#password aux
\ No newline at end of file
+#password aux
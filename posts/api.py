@@ -0,0 +1,73 @@
+"""
+Read-only JSON for the feed, category feeds and post detail, for mobile
+clients and the infinite scroll. `fields=` picks the columns, and only
+those are loaded. `expand=tags` adds each page's tags from one batched
+query. Pages follow the feed's keyset cursors.
+"""
+
+from django.db.models import Prefetch
+from django.http import JsonResponse
+
+from .models import Tag
+from .pagination import FEED_ORDERING
+
+API_FIELDS = (
+    "id",
+    "title",
+    "artist",
+    "url",
+    "image",
+    "body",
+    "created",
+    "updated",
+    "status",
+    "like_count",
+    "comment_count",
+)
+API_EXPANSIONS = ("tags",)
+
+
+class InvalidQuery(Exception):
+    pass
+
+
+def _names(request, param, allowed):
+    names = [name.strip() for name in request.GET.get(param, "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise InvalidQuery(f"Unknown {param}: {', '.join(unknown)}")
+    return names
+
+
+def parse_query(request):
+    """(fields, expand) from ?fields=title,image&expand=tags, every field by default"""
+    fields = _names(request, "fields", API_FIELDS)
+    if fields:
+        # Always the id, to tell posts apart and fetch one
+        fields = tuple(name for name in API_FIELDS if name == "id" or name in fields)
+    else:
+        fields = API_FIELDS
+    return fields, tuple(_names(request, "expand", API_EXPANSIONS))
+
+
+def select(posts, fields, expand):
+    # Next cursors are read off the ordering columns, asked for or not
+    ordering = [field.lstrip("-") for field in FEED_ORDERING]
+    posts = posts.only(*dict.fromkeys([*fields, *ordering]))
+    if "tags" in expand:
+        posts = posts.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("name", "slug"))
+        )
+    return posts
+
+
+def serialize(post, fields, expand):
+    data = {name: getattr(post, name) for name in fields}
+    if "tags" in expand:
+        data["tags"] = [{"slug": tag.slug, "name": tag.name} for tag in post.tags.all()]
+    return data
+
+
+def api_response(data, status=200):
+    """JsonResponse without the whitespace json.dumps puts after , and :"""
+    return JsonResponse(data, status=status, json_dumps_params={"separators": (",", ":")})
@@ -0,0 +1,142 @@
+"""
+Async versions of the feed, post page and create views, routed instead of
+the ones in posts.views when POSTS_ASYNC_VIEWS is on. Meant for ASGI (see
+the README): the create view awaits Flickr instead of holding a worker
+thread for the whole fetch, and queries go through the async ORM.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from . import scraping
+from .comments import COMMENT_ORDERINGS, acomment_page
+from .forms import CommentCreateForm, PostCreateForm, ReplyCreateForm
+from .http_cache import conditional, feed_etag, post_etag
+from .jobs import enqueue_scrape
+from .models import Post, Tag
+from .pagination import InvalidCursor, apaginate
+from .replicas import replica_reads
+from .search import search_posts
+from .sidebar import sidebar_context
+
+
+async def arender(request, template_name, context):
+    # Templates can still reach the database (request.user, the sidebar,
+    # {% cache %} on a database backend), so they render off the event loop
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@replica_reads
+@conditional(feed_etag)
+async def home_view(request, tag=None):
+    q = request.GET.get("q", "").strip()
+    cursor = request.GET.get("cursor")
+    if tag:
+        tag = await aget_object_or_404(Tag, slug=tag)
+
+    try:
+        if q:
+            posts, next_cursor = await sync_to_async(search_posts)(q, tag and tag.slug, cursor)
+        elif tag:
+            posts, next_cursor = await apaginate(Post.objects.feed().filter(tags=tag), cursor)
+        else:
+            posts, next_cursor = await apaginate(Post.objects.feed(), cursor)
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+
+    context = {"posts": posts, "next_cursor": next_cursor, "tag": tag, "q": q}
+    if request.headers.get("HX-Request"):
+        return await arender(request, "posts/partials/feed.html", context)
+
+    context.update(await sync_to_async(sidebar_context)(tag))
+    return await arender(request, "posts/home.html", context)
+
+
+@replica_reads
+@conditional(post_etag)
+async def post_page_view(request, pk):
+    post = await aget_object_or_404(Post.objects.feed(), id=pk)
+    sort = request.GET.get("sort")
+    if sort not in COMMENT_ORDERINGS:
+        sort = "newest"
+
+    try:
+        comments, next_cursor = await acomment_page(post, sort, request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+
+    context = {
+        "post": post,
+        "comments": comments,
+        "next_cursor": next_cursor,
+        "sort": sort,
+        "comment_form": CommentCreateForm(),
+        "reply_form": ReplyCreateForm(),
+    }
+    if request.headers.get("HX-Request"):
+        return await arender(request, "posts/partials/comments.html", context)
+    return await arender(request, "posts/post_page.html", context)
+
+
+def _enqueue(form, post):
+    with transaction.atomic():
+        enqueue_scrape(post)
+        form.save_m2m()
+
+
+async def post_create_view(request):
+    form = PostCreateForm()
+
+    if request.method == "POST":
+        form = PostCreateForm(request.POST)
+        # Validating the tags field queries the database
+        if await sync_to_async(form.is_valid)():
+            post = form.save(commit=False)
+            url = form.cleaned_data.get("url")
+
+            duplicate = await Post.objects.with_url(url).only("id").afirst()
+            if duplicate is not None:
+                messages.info(request, "This post has already been shared.")
+                return redirect("post", duplicate.id)
+
+            if getattr(settings, "POSTS_ASYNC_INGEST", False):
+                try:
+                    await sync_to_async(_enqueue)(form, post)
+                except IntegrityError:
+                    messages.info(request, "This post has already been shared.")
+                    return redirect("home")
+                messages.success(request, "Post created, fetching the image ...")
+                return redirect("home")
+
+            try:
+                data = await scraping.ascrape_post_data(url)
+                post.image = data["image"]
+                post.title = data["title"]
+                post.artist = data["artist"]
+
+                await post.asave()
+                await sync_to_async(form.save_m2m)()
+
+                messages.success(request, "Post created successfully!")
+                return redirect("home")
+
+            except IntegrityError:
+                messages.info(request, "This post has already been shared.")
+                return redirect("home")
+            except scraping.ScrapeError as e:
+                messages.error(request, str(e))
+            except scraping.RequestException as e:
+                messages.error(request, f"Error fetching data: {str(e)}")
+            except Exception as e:
+                messages.error(request, f"An unexpected error occurred: {str(e)}")
+
+        else:
+            messages.error(
+                request, "Invalid form submission. Please correct the errors."
+            )
+
+    return await arender(request, "posts/post_create.html", {"form": form})
@@ -0,0 +1,76 @@
+"""
+Moderation on many posts at once, for the admin actions and the staff
+JSON endpoint. Each operation is one transaction of set-based statements
+on posts_post_tags (or the post tables). The tag counters, card cache
+and sidebar are then brought up to date once for the whole batch, not
+once per post through the signals.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Post, Tag
+from .signals import bulk_change, card_key, touch_posts
+from .tag_stats import recount_tags
+
+BULK_ACTIONS = ("delete", "add_tag", "remove_tag")
+
+Link = Post.tags.through
+
+
+def _lock(tag):
+    # Two batches on the same tag queue up instead of counting over each other
+    Tag.objects.select_for_update().filter(pk=tag.pk).exists()
+
+
+def bulk_add_tag(post_ids, tag):
+    """Tag the posts that don't have the tag yet. Returns how many gained it."""
+    with transaction.atomic():
+        _lock(tag)
+        untagged = Post.objects.filter(pk__in=post_ids).exclude(tags=tag)
+        new = list(untagged.values_list("id", flat=True))
+        Link.objects.bulk_create(
+            [Link(post_id=post_id, tag_id=tag.pk) for post_id in new], ignore_conflicts=True
+        )
+        touch_posts(new)
+        recount_tags([tag.pk])
+    return len(new)
+
+
+def bulk_remove_tag(post_ids, tag):
+    """Untag the posts. Returns how many lost the tag."""
+    with transaction.atomic():
+        _lock(tag)
+        links = Link.objects.filter(tag=tag, post_id__in=post_ids)
+        removed = list(links.values_list("post_id", flat=True))
+        links.delete()
+        touch_posts(removed)
+        recount_tags([tag.pk])
+    return len(removed)
+
+
+def bulk_delete_posts(post_ids):
+    """
+    Delete the posts with their likes, comments and jobs. Returns how many
+    posts were deleted.
+    """
+    with transaction.atomic():
+        posts = Post.objects.filter(pk__in=post_ids)
+        cards = [card_key(post.id, post.card_version) for post in posts.only("id", "updated")]
+        links = Link.objects.filter(post_id__in=post_ids)
+        tag_ids = list(links.values_list("tag_id", flat=True).distinct())
+        # Still one DELETE per table, the signals we skip are the per-row bookkeeping
+        with bulk_change():
+            _, deleted = posts.delete()
+        # Also bumps the tag generation, which the feed's ETag needs to notice deletes
+        recount_tags(tag_ids)
+    cache.delete_many(cards)
+    return deleted.get(Post._meta.label, 0)
+
+
+def run_bulk_action(action, post_ids, tag=None):
+    if action == "delete":
+        return bulk_delete_posts(post_ids)
+    if action == "add_tag":
+        return bulk_add_tag(post_ids, tag)
+    return bulk_remove_tag(post_ids, tag)
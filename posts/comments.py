@@ -0,0 +1,35 @@
+from django.db.models import Prefetch
+
+from .models import Comment, Reply
+from .pagination import apaginate, paginate
+
+COMMENTS_PAGE_SIZE = 20
+
+# The tabs on the post page, each read off its own index on Comment. No
+# "top" tab until comments can be liked.
+COMMENT_ORDERINGS = {
+    "newest": ("-created", "-id"),
+}
+
+
+def _comments(post):
+    return (
+        Comment.objects.filter(post=post)
+        .select_related("author")
+        .prefetch_related(
+            Prefetch("replies", queryset=Reply.objects.select_related("author"))
+        )
+    )
+
+
+def comment_page(post, sort="newest", cursor=None, page_size=COMMENTS_PAGE_SIZE):
+    """
+    A page of top-level comments with their authors and every reply (and
+    its author) attached. Two queries however many threads are on the page.
+    Returns (comments, next_cursor).
+    """
+    return paginate(_comments(post), cursor, page_size, ordering=COMMENT_ORDERINGS[sort])
+
+
+async def acomment_page(post, sort="newest", cursor=None, page_size=COMMENTS_PAGE_SIZE):
+    return await apaginate(_comments(post), cursor, page_size, ordering=COMMENT_ORDERINGS[sort])
@@ -0,0 +1,74 @@
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
+
+from .models import Post, Tag
+
+
+@pytest.fixture(scope="session", autouse=True)
+def shared_cache(tmp_path_factory):
+    """
+    Fixture to give the test run a shared cache of its own, rather than
+    clear the one a dev server or worker on this checkout uses. Processes
+    the tests start find it through SHARED_CACHE_DIR.
+    """
+    location = tmp_path_factory.mktemp("shared_cache")
+    shared = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": location,
+    }
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SHARED_CACHE_DIR", str(location))
+        monkeypatch.delenv("REDIS_URL", raising=False)
+        with override_settings(CACHES={**settings.CACHES, "shared": shared}):
+            yield location
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Fixture to start and leave every test with empty caches."""
+    for alias in ("default", "shared"):
+        caches[alias].clear()
+    yield
+    for alias in ("default", "shared"):
+        caches[alias].clear()
+
+
+@pytest.fixture(autouse=True)
+def read_primary(settings):
+    """
+    Fixture to keep reads on the primary. Configured replicas mirror it in
+    tests but through another connection, which can't see a test's rows.
+    """
+    settings.DATABASE_REPLICAS = []
+
+
+@pytest.fixture
+def tag(db):
+    """Fixture to create a tag."""
+    return Tag.objects.create(name="Nature", slug="nature")
+
+
+@pytest.fixture
+def tags(db):
+    """Fixture to create two tags."""
+    return [
+        Tag.objects.create(name="Nature", slug="nature"),
+        Tag.objects.create(name="Urban", slug="urban"),
+    ]
+
+
+@pytest.fixture
+def post(db):
+    """Fixture to create a post."""
+    return Post.objects.create(
+        title="Test Post", image="https://example.com/image.jpg", body="Test content"
+    )
+
+
+@pytest.fixture
+def user(db):
+    """Fixture to create a user."""
+    return get_user_model().objects.create_user("lisa", "lisa@example.com", "password")
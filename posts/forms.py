@@ -1,8 +1,9 @@
 from django import forms
 from django.forms import ModelForm
 
-from .models import Post
-
+from .bulk import BULK_ACTIONS
+from .models import Comment, Post, Reply, Tag
+from .post_urls import normalize_url
 
 
 class PostCreateForm(ModelForm):
@@ -25,9 +26,7 @@ class PostCreateForm(ModelForm):
     def clean_url(self):
         """Ensure the URL has a valid scheme (http/https)"""
         url = self.cleaned_data.get("url")  # Use .get() to avoid KeyErrors
-        if url and not url.startswith(("http://", "https://")):
-            url = "https://" + url  # Default to https
-        return url
+        return normalize_url(url) if url else url
 
 
 class PostEditForm(ModelForm):
@@ -39,3 +38,55 @@ class PostEditForm(ModelForm):
             "body": forms.Textarea(attrs={"rows": 3, "class": "font text-4xl"}),
             "tags": forms.CheckboxSelectMultiple(),
         }
+
+
+class CommentCreateForm(ModelForm):
+    class Meta:
+        model = Comment
+        fields = ["body"]
+        widgets = {
+            "body": forms.TextInput(attrs={"placeholder": "Add comment ..."}),
+        }
+        labels = {"body": ""}
+
+
+class ReplyCreateForm(ModelForm):
+    class Meta:
+        model = Reply
+        fields = ["body"]
+        widgets = {
+            "body": forms.TextInput(attrs={"placeholder": "Add reply ..."}),
+        }
+        labels = {"body": ""}
+
+
+class LimitedModelMultipleChoiceField(forms.ModelMultipleChoiceField):
+    """Refuses more than `limit` values before looking any of them up"""
+
+    def __init__(self, queryset, limit, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.limit = limit
+
+    def clean(self, value):
+        if isinstance(value, (list, tuple)) and len(value) > self.limit:
+            raise forms.ValidationError(f"At most {self.limit} values per request.")
+        return super().clean(value)
+
+
+class BulkPostsForm(forms.Form):
+    """The JSON body of the staff bulk endpoint"""
+
+    MAX_POSTS = 1000
+
+    action = forms.ChoiceField(choices=[(action, action) for action in BULK_ACTIONS])
+    posts = LimitedModelMultipleChoiceField(Post.objects.only("id"), MAX_POSTS)
+    tag = forms.ModelChoiceField(Tag.objects.all(), to_field_name="slug", required=False)
+
+    def clean_posts(self):
+        return [post.id for post in self.cleaned_data["posts"]]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("action") in ("add_tag", "remove_tag") and not cleaned_data.get("tag"):
+            self.add_error("tag", "This action needs a tag.")
+        return cleaned_data
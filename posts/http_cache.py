@@ -0,0 +1,109 @@
+"""
+ETags for the feed and post page, so a client or proxy holding the current
+version gets a 304 before any template work, and Cache-Control/Vary that
+let a reverse proxy keep anonymous pages for POSTS_PROXY_CACHE_SECONDS.
+
+There is no Last-Modified: a page also changes with deletes, tag renames,
+the viewer and htmx, none of which a timestamp can show, so an
+If-Modified-Since revalidation would get a wrong 304.
+"""
+
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import Post
+from .sidebar import tag_generation
+
+
+def _etag(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def _viewer(request):
+    """What shapes the page besides the data: the URL, who asks and whether htmx does"""
+    user = request.user
+    return (
+        request.get_full_path(),
+        user.pk if user.is_authenticated else None,
+        bool(request.headers.get("HX-Request")),
+    )
+
+
+def feed_etag(request, tag=None):
+    """
+    Any post created or updated moves the newest stamps. Deleting a post
+    leaves none behind, so deletes bump the shared tag generation (see
+    signals and posts.bulk).
+    """
+    stamps = Post.objects.aggregate(created=Max("created"), updated=Max("updated"))
+    return _etag(stamps["created"], stamps["updated"], tag_generation(), *_viewer(request))
+
+
+def post_etag(request, pk):
+    """Post.updated moves with edits, likes, comments and retagging"""
+    updated = Post.objects.filter(pk=pk).values_list("updated", flat=True).first()
+    if updated is None:
+        return None  # the view answers 404
+    return _etag(updated, tag_generation(), *_viewer(request))
+
+
+def _validate(request, etag_func, args, kwargs):
+    if len(messages.get_messages(request)):
+        # A flash message is waiting to be shown, so this one response is unique
+        request._etag = None
+    else:
+        request._etag = etag_func(request, *args, **kwargs)
+
+
+def _cache_headers(request, response):
+    patch_vary_headers(response, ["Cookie", "HX-Request"])
+    if response.status_code not in (200, 304):
+        return
+    if request.user.is_authenticated or request._etag is None:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=0, s_maxage=settings.POSTS_PROXY_CACHE_SECONDS
+        )
+
+
+def conditional(etag_func):
+    """
+    Serve the view through condition() with the ETag that
+    `etag_func(request, *args, **kwargs)` returns, and mark anonymous
+    responses as cacheable by shared caches.
+    """
+
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=lambda request, *args, **kwargs: request._etag
+        )(view)
+
+        if iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                await sync_to_async(_validate)(request, etag_func, args, kwargs)
+                response = await conditional_view(request, *args, **kwargs)
+                _cache_headers(request, response)
+                return response
+
+        else:
+
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                _validate(request, etag_func, args, kwargs)
+                response = conditional_view(request, *args, **kwargs)
+                _cache_headers(request, response)
+                return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,214 @@
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from . import scraping
+from .perf import record_cache, timed
+
+# Without Pillow every variant is the original image. Checked without
+# importing it, resize() does that on the first miss.
+PILLOW = find_spec("PIL") is not None
+
+IMAGE_TIMEOUT = 10
+
+
+class ImageError(Exception):
+    """Flickr answered with something that isn't a readable image"""
+
+
+# name -> (width, height or None to keep the aspect ratio)
+IMAGE_VARIANTS = {
+    "feed": (800, None),  # post cards
+    "thumb": (80, 80),  # sidebar lists, 40px at 2x
+}
+
+DEFAULT_IMAGE_CACHE = {
+    "DIR": "image_cache",  # relative to MEDIA_ROOT
+    "MAX_BYTES": 512 * 1024 * 1024,
+}
+
+
+def image_etag(source_url, variant):
+    """Flickr static URLs never change content, so the URL stands for the bytes"""
+    digest = hashlib.sha256(f"{source_url}|{variant}|{PILLOW}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+class ImageCache:
+    """
+    Flickr images and their resized variants on local disk, one directory
+    per post. Fetches the original once, derives each variant from it on
+    first request, and evicts the least recently used files once the
+    directory grows past max_bytes.
+    """
+
+    # Hits refresh a file's mtime for LRU at most this often
+    TOUCH_INTERVAL = 60 * 60
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._size = None  # bytes on disk, counted on first store
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def path(self, post_id, variant):
+        return self.root / str(post_id) / variant
+
+    def get(self, post_id, source_url, variant):
+        """Path and content type of the variant, fetched or resized if missing"""
+        content_type = "image/jpeg"
+        if variant == "original" or not PILLOW:
+            variant = "original"
+            content_type = mimetypes.guess_type(urlsplit(source_url).path)[0] or content_type
+
+        path = self.path(post_id, variant)
+        hit = self._hit(path)
+        record_cache("image", hit)
+        if hit:
+            return path, content_type
+
+        if variant != "original":
+            # Before taking this variant's lock, so no thread ever holds two
+            original, _ = self.get(post_id, source_url, "original")
+
+        # One fetch or resize per image at a time, concurrent misses wait for it
+        with self._key_locks[hash((str(post_id), variant)) % len(self._key_locks)]:
+            if not path.exists():
+                if variant == "original":
+                    data = self._fetch(source_url)
+                    check_image(data)
+                    self._store(path, data)
+                else:
+                    try:
+                        data = resize(original.read_bytes(), *IMAGE_VARIANTS[variant])
+                    except ImageError:
+                        # Fetch it again next time rather than fail on it until evicted
+                        original.unlink(missing_ok=True)
+                        raise
+                    self._store(path, data)
+        return path, content_type
+
+    def _hit(self, path):
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if time.time() - mtime > self.TOUCH_INTERVAL:
+            os.utime(path)
+        return True
+
+    def _fetch(self, url):
+        with timed("scrape"):
+            # The bytes go to disk, a copy in the validator cache would only
+            # hold memory
+            response = scraping.get_client().get(url, remember=False, timeout=IMAGE_TIMEOUT)
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        if not content_type.startswith("image/"):
+            raise ImageError(f"{url} answered with {content_type or 'no content type'}")
+        return response.content
+
+    def _store(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)  # readers never see a half written file
+        with self._lock:
+            if self._size is None:
+                self._size = self.disk_usage()
+            else:
+                self._size += len(data)
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _files(self):
+        # Skips the temporary files _store is still writing
+        return (f for f in self.root.glob("*/*") if not f.name.startswith("."))
+
+    def disk_usage(self):
+        return sum(f.stat().st_size for f in self._files())
+
+    def evict(self, target=0.9):
+        """Delete the least recently used files until the cache is at target * max_bytes"""
+        with self._lock:
+            files = []
+            for f in self._files():
+                try:
+                    stat = f.stat()
+                except FileNotFoundError:  # evicted by another process
+                    continue
+                files.append((stat.st_mtime, stat.st_size, f))
+            size = sum(s for _, s, _ in files)
+            for _, file_size, f in sorted(files):
+                if size <= self.max_bytes * target:
+                    break
+                f.unlink(missing_ok=True)
+                size -= file_size
+            self._size = size
+
+
+def _decode_errors():
+    """What Pillow raises for bytes it can't read as an image"""
+    from PIL import Image
+
+    return (OSError, SyntaxError, ValueError, Image.DecompressionBombError)
+
+
+def check_image(data):
+    """Raise ImageError unless data looks like an image Pillow can open"""
+    if not data:
+        raise ImageError("Empty image")
+    if not PILLOW:
+        return
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+    except _decode_errors() as e:
+        raise ImageError(str(e)) from e
+
+
+def resize(data, width, height=None):
+    """JPEG of the image scaled down to width, or cropped to width x height"""
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            if height:
+                image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+            elif image.width > width:
+                image = image.resize(
+                    (width, round(image.height * width / image.width)),
+                    Image.Resampling.LANCZOS,
+                )
+            out = io.BytesIO()
+            image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+            return out.getvalue()
+    except _decode_errors() as e:  # e.g. a truncated download
+        raise ImageError(str(e)) from e
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = {**DEFAULT_IMAGE_CACHE, **getattr(settings, "POSTS_IMAGE_CACHE", {})}
+                _cache = ImageCache(Path(settings.MEDIA_ROOT) / config["DIR"], config["MAX_BYTES"])
+    return _cache
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import scraping
+from .models import Post, ScrapeJob
+
+# A claimed job that hasn't finished after this long is assumed lost with its
+# worker and gets picked up again
+JOB_LEASE = timedelta(minutes=5)
+
+
+def max_attempts():
+    return getattr(settings, "SCRAPE_MAX_ATTEMPTS", 5)
+
+
+def backoff(attempts):
+    """Exponential backoff before the next try: 10s, 20s, 40s, ..."""
+    base = getattr(settings, "SCRAPE_RETRY_DELAY", 10)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def enqueue_scrape(post):
+    post.status = Post.PENDING
+    post.save()
+    return ScrapeJob.objects.create(post=post, run_after=timezone.now())
+
+
+def claim_jobs(limit=10):
+    """
+    Lease up to `limit` due jobs to this worker. skip_locked lets several
+    workers poll the table at once without handing out the same job twice.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ScrapeJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[ScrapeJob.QUEUED, ScrapeJob.RUNNING], run_after__lte=now
+            )
+            .order_by("run_after")[:limit]
+        )
+        ScrapeJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ScrapeJob.RUNNING, run_after=now + JOB_LEASE
+        )
+    return jobs
+
+
+def _is_permanent(error):
+    if isinstance(error, scraping.ScrapeError):
+        return True
+    # 4xx responses won't get better by asking again, except rate limiting
+    response = getattr(error, "response", None)
+    return (
+        isinstance(error, scraping.HTTPError)
+        and response is not None
+        and 400 <= response.status_code < 500
+        and response.status_code != 429
+    )
+
+
+def _update(instance, **fields):
+    """
+    Write only `fields`. The post may be edited or deleted while its page is
+    fetched, and a full save() would undo the edit, or insert the deleted
+    post (or its job, deleted with it) again. Returns the rows matched.
+    """
+    return type(instance).objects.filter(pk=instance.pk).update(**fields)
+
+
+def run_job(job):
+    post = job.post
+    job.attempts += 1
+    try:
+        data = scraping.scrape_post_data(post.url)
+    except Exception as e:
+        # Unexpected errors are retried like network ones, rather than killing
+        # the worker with the job unsaved and the rest of its batch leased
+        job.last_error = str(e) or repr(e)
+        if _is_permanent(e) or job.attempts >= max_attempts():
+            job.status = ScrapeJob.FAILED
+            _update(post, status=Post.FAILED, updated=timezone.now())
+        else:
+            job.status = ScrapeJob.QUEUED
+            job.run_after = timezone.now() + backoff(job.attempts)
+        _update(
+            job,
+            attempts=job.attempts,
+            status=job.status,
+            run_after=job.run_after,
+            last_error=job.last_error,
+        )
+        return False
+
+    # `updated` gives the card a new version, see posts.signals
+    ready = _update(
+        post,
+        image=data["image"],
+        title=data["title"],
+        artist=data["artist"],
+        status=Post.READY,
+        updated=timezone.now(),
+    )
+    if not ready:  # deleted meanwhile, and the job with it
+        return False
+    job.status = ScrapeJob.DONE
+    job.last_error = ""
+    _update(job, attempts=job.attempts, status=job.status, last_error=job.last_error)
+    return True
+
+
+def run_pending_jobs(limit=10):
+    """Run one batch of due jobs, returns how many were processed"""
+    jobs = claim_jobs(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
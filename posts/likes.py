@@ -0,0 +1,23 @@
+from django.db import transaction
+
+from .models import Like, Post
+
+
+def toggle_like(user, post):
+    """
+    Like the post, or take the like back if the user already did. The
+    count and hot score move in the same transaction, with the post row
+    locked so concurrent likes don't lose updates. Returns the fresh post.
+    """
+    with transaction.atomic():
+        post = Post.objects.select_for_update().get(pk=post.pk)
+        unliked, _ = Like.objects.filter(user=user, post=post).delete()
+        if unliked:
+            post.like_count -= 1
+        else:
+            Like.objects.create(user=user, post=post)
+            post.like_count += 1
+        post.rescore()
+        # The new `updated` gives the card a new version, see posts.signals
+        post.save(update_fields=["like_count", "hot_score", "updated"])
+    return post
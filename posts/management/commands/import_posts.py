@@ -0,0 +1,139 @@
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from requests.exceptions import RequestException
+
+from posts.models import Post, Tag
+from posts.post_urls import normalize_url, url_key
+from posts.scraper import ScrapeError, scrape_post_data
+from posts.tag_stats import count_added
+
+
+class Command(BaseCommand):
+    help = (
+        "Create posts from Flickr URLs, one per line: "
+        "url[<TAB>tag-slug,tag-slug[<TAB>caption]]. Reads stdin when FILE is '-'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", nargs="?", default="-")
+        parser.add_argument(
+            "--workers", type=int, default=8, help="Pages fetched concurrently"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100, help="Lines written per transaction"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="File recording how many lines are done, so a rerun resumes there",
+        )
+
+    def handle(self, *args, **options):
+        lines = self.read_lines(options["file"])
+        checkpoint = Path(options["checkpoint"]) if options["checkpoint"] else None
+        done = int(checkpoint.read_text()) if checkpoint and checkpoint.exists() else 0
+        if done:
+            self.stdout.write(f"Resuming after line {done}")
+
+        self.tags = {tag.slug: tag for tag in Tag.objects.all()}
+        self.totals = {"created": 0, "skipped": 0, "failed": 0}
+        batch_size = options["batch_size"]
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(options["workers"]) as pool:
+            for offset in range(done, len(lines), batch_size):
+                self.import_batch(pool, lines[offset : offset + batch_size])
+                done = min(offset + batch_size, len(lines))
+                if checkpoint:
+                    checkpoint.write_text(str(done))
+
+        elapsed = time.perf_counter() - start
+        rate = (self.totals["created"] + self.totals["failed"]) / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Created {created}, skipped {skipped}, failed {failed}".format(**self.totals)
+                + f" in {elapsed:.1f}s ({rate:.1f} URLs/s)"
+            )
+        )
+
+    def read_lines(self, path):
+        if path == "-":
+            return sys.stdin.read().splitlines()
+        try:
+            return Path(path).read_text().splitlines()
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+    def parse(self, line):
+        url, tags, body = (line.split("\t") + ["", ""])[:3]
+        slugs = [slug.strip() for slug in tags.split(",") if slug.strip()]
+        unknown = [slug for slug in slugs if slug not in self.tags]
+        if unknown:
+            self.stderr.write(f"Unknown tags for {url}: {', '.join(unknown)}")
+        return normalize_url(url), [self.tags[s] for s in slugs if s in self.tags], body
+
+    def import_batch(self, pool, lines):
+        # Keyed like Post.url_key, so http:// and https:// spellings are one entry
+        entries = {}
+        for line in lines:
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            url, tags, body = self.parse(line)
+            key = url_key(url)
+            if key in entries:
+                self.totals["skipped"] += 1
+            else:
+                entries[key] = (url, tags, body)
+
+        # Checked before fetching, so URLs already posted cost no requests
+        existing = set(
+            Post.objects.filter(url_key__in=entries).values_list("url_key", flat=True)
+        )
+        self.totals["skipped"] += len(existing)
+        keys = [key for key in entries if key not in existing]
+
+        posts = []
+        for key, result in zip(keys, pool.map(self.fetch, [entries[k][0] for k in keys])):
+            url, tags, body = entries[key]
+            if isinstance(result, Exception):
+                self.stderr.write(f"Failed {url}: {result}")
+                self.totals["failed"] += 1
+                continue
+            # bulk_create skips Post.save(), which would fill in url_key
+            posts.append(Post(url=url, url_key=key, body=body, **result))
+
+        with transaction.atomic():
+            # A URL posted from the site while this batch was fetching is
+            # skipped rather than failing the whole batch on the unique key
+            Post.objects.bulk_create(posts, ignore_conflicts=True)
+            inserted = set(
+                Post.objects.filter(pk__in=[post.pk for post in posts]).values_list(
+                    "pk", flat=True
+                )
+            )
+            post_tags = [
+                Post.tags.through(post_id=post.pk, tag_id=tag.id)
+                for post in posts
+                if post.pk in inserted
+                for tag in entries[post.url_key][1]
+            ]
+            Post.tags.through.objects.bulk_create(post_tags)
+            # bulk_create sends no m2m_changed, so the tag counters are ours to bump
+            tagged = defaultdict(list)
+            for link in post_tags:
+                tagged[link.tag_id].append(link.post_id)
+            for tag_id, post_ids in tagged.items():
+                count_added([tag_id], post_ids)
+        self.totals["created"] += len(inserted)
+        self.totals["skipped"] += len(posts) - len(inserted)
+
+    def fetch(self, url):
+        try:
+            return scrape_post_data(url)
+        except (RequestException, ScrapeError) as e:
+            return e
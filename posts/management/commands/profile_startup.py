@@ -0,0 +1,131 @@
+import os
+import re
+import subprocess
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PHASES = ("python", "settings", "apps", "urlconf", "middleware")
+
+# Run in a fresh interpreter, as this one has imported everything already.
+# Each phase is what a worker does before serving its first request.
+PROBE = """
+import sys
+import time
+
+sys.stderr.write("phase python\\n")  # site, encodings and .pth imports came before
+sys.stderr.flush()
+start = time.perf_counter()
+
+
+def phase(name):
+    global start
+    now = time.perf_counter()
+    sys.stderr.write(f"phase {name} {(now - start) * 1000:.1f}\\n")
+    sys.stderr.flush()
+    start = now
+
+
+import django
+from django.conf import settings
+
+settings.INSTALLED_APPS
+phase("settings")
+django.setup()
+phase("apps")
+from django.urls import get_resolver
+
+get_resolver().url_patterns
+phase("urlconf")
+from django.core.handlers.wsgi import WSGIHandler
+
+WSGIHandler()
+phase("middleware")
+"""
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+Import = namedtuple("Import", "module self_ms cumulative_ms depth phase")
+
+
+def profile_startup(settings_module, python=sys.executable):
+    """
+    Start a new interpreter under -X importtime, load the project like a
+    worker does and return ({phase: ms}, [Import]) for every module it
+    imported, tagged with the phase that imported it. Phases are wall time,
+    except "python", the interpreter's own imports before the project loads.
+    """
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", PROBE],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+    phases = {}
+    imports = []
+    pending = []  # imports of the phase that hasn't ended yet
+    for line in result.stderr.splitlines():
+        if line.startswith("phase "):
+            _, name, *ms = line.split()
+            phase = [Import(*fields, name) for fields in pending]
+            phases[name] = (
+                float(ms[0]) if ms else sum(i.cumulative_ms for i in phase if i.depth == 0)
+            )
+            imports += phase
+            pending = []
+        elif match := IMPORT_LINE.match(line):
+            self_us, cumulative_us, indent, module = match.groups()
+            pending.append(
+                (module, int(self_us) / 1000, int(cumulative_us) / 1000, len(indent) // 2)
+            )
+    return phases, imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Report how long a cold start takes to load the settings, the apps, "
+        "the URLconf and the middleware, and which imports cost the most"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="Imports to list")
+        parser.add_argument(
+            "--sort",
+            choices=["cumulative", "self"],
+            default="cumulative",
+            help="cumulative includes what each module imports in turn",
+        )
+        parser.add_argument(
+            "--budget",
+            type=float,
+            help="Fail if the whole startup takes longer, in milliseconds",
+        )
+
+    def handle(self, *args, **options):
+        phases, imports = profile_startup(settings.SETTINGS_MODULE)
+        total = sum(phases.values())
+
+        self.stdout.write(f"{'Phase':<12}{'ms':>9}  {'imports':>7}")
+        for name in PHASES:
+            count = sum(1 for imported in imports if imported.phase == name)
+            self.stdout.write(f"{name:<12}{phases.get(name, 0):9.1f}  {count:7}")
+        self.stdout.write(f"{'total':<12}{total:9.1f}  {len(imports):7}")
+
+        key = "cumulative_ms" if options["sort"] == "cumulative" else "self_ms"
+        slowest = sorted(imports, key=lambda imported: getattr(imported, key), reverse=True)
+        self.stdout.write(f"\nSlowest imports ({options['sort']} ms)")
+        for imported in slowest[: options["top"]]:
+            self.stdout.write(
+                f"{getattr(imported, key):9.1f}  {imported.module:<50} {imported.phase}"
+            )
+
+        if options["budget"] is not None and total > options["budget"]:
+            raise CommandError(
+                f"Startup took {total:.0f}ms, over the {options['budget']:.0f}ms budget"
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Tag
+from posts.tag_stats import recount_tags
+
+
+class Command(BaseCommand):
+    help = "Recompute each tag's post count and latest post from posts_post_tags"
+
+    def handle(self, *args, **options):
+        before = dict(Tag.objects.values_list("id", "post_count"))
+        recount_tags()
+        after = dict(Tag.objects.values_list("id", "post_count"))
+        drifted = sum(1 for tag_id, count in after.items() if before.get(tag_id) != count)
+        self.stdout.write(
+            self.style.SUCCESS(f"Recounted {len(after)} tag(s), {drifted} had drifted")
+        )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Fetch Flickr data for posts created in background ingestion mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Run the due jobs once and exit"
+        )
+        parser.add_argument(
+            "--batch", type=int, default=10, help="Jobs claimed per poll"
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=2.0, help="Seconds to wait when idle"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = run_pending_jobs(options["batch"])
+            if processed:
+                self.stdout.write(f"Processed {processed} job(s)")
+            if options["once"]:
+                break
+            if processed < options["batch"]:
+                time.sleep(options["sleep"])
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Postgres only: a stored tsvector kept current by the database itself on
+# every insert/update, with a GIN index for @@ matches. Other databases use
+# the in-process index in posts/search.py.
+ADD_SEARCH_VECTOR = """
+ALTER TABLE posts_post ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(artist, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(body, '')), 'C')
+) STORED;
+CREATE INDEX posts_post_search_vector_idx ON posts_post USING GIN (search_vector);
+"""
+
+DROP_SEARCH_VECTOR = """
+DROP INDEX IF EXISTS posts_post_search_vector_idx;
+ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(ADD_SEARCH_VECTOR)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_VECTOR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:50
+
+import uuid
+from django.db import migrations, models
+
+# Postgres converts the varchar ids in place (id::uuid) and Django alters the
+# referencing columns with it. Elsewhere a UUIDField is char(32) without
+# dashes, so the existing ids and every column pointing at them are rewritten
+# to that form before the field changes.
+
+DASHED = "substr({0}, 1, 8) || '-' || substr({0}, 9, 4) || '-' || substr({0}, 13, 4) || '-' || substr({0}, 17, 4) || '-' || substr({0}, 21)"
+
+
+def post_id_columns(apps):
+    Post = apps.get_model("posts", "Post")
+    columns = [(Post._meta.db_table, "id")]
+    for rel in Post._meta.related_objects:
+        columns.append((rel.related_model._meta.db_table, rel.field.column))
+    through = Post._meta.get_field("tags").remote_field.through
+    columns.append((through._meta.db_table, through._meta.get_field("post").column))
+    return columns
+
+
+def strip_dashes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        return
+    quote = schema_editor.quote_name
+    for table, column in post_id_columns(apps):
+        schema_editor.execute(
+            f"UPDATE {quote(table)} SET {quote(column)} = lower(replace({quote(column)}, '-', ''))"
+        )
+
+
+def add_dashes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        return
+    quote = schema_editor.quote_name
+    for table, column in post_id_columns(apps):
+        schema_editor.execute(
+            f"UPDATE {quote(table)} SET {quote(column)} = {DASHED.format(quote(column))}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_dashes, add_dashes),
+        migrations.AlterField(
+            model_name='post',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_id_uuidfield'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created', '-id'], name='posts_post_feed_idx'),
+        ),
+        # The auto-created through table only has the unique (post_id, tag_id)
+        # and single column FK indexes. Category pages go tag -> posts, which
+        # this answers from the index alone.
+        migrations.RunSQL(
+            'CREATE INDEX posts_post_tags_tag_post_idx ON posts_post_tags (tag_id, post_id);',
+            'DROP INDEX posts_post_tags_tag_post_idx;',
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_tag_stats(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Tag = apps.get_model('posts', 'Tag')
+    links = Post.tags.through.objects.filter(tag=OuterRef('pk'))
+    Tag.objects.update(
+        post_count=Coalesce(
+            Subquery(links.values('tag').annotate(n=Count('pk')).values('n')), 0
+        ),
+        latest_post=Subquery(
+            Post.objects.filter(tags=OuterRef('pk')).order_by('-created', '-id').values('pk')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='latest_post',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.post'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_tag_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:58
+
+import django.db.models.deletion
+import posts.ranking
+from django.conf import settings
+from django.db import migrations, models
+
+
+def score_existing_posts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    rows = list(Post.objects.only('created'))
+    for row in rows:
+        row.hot_score = posts.ranking.hot_score(0, row.created)
+    Post.objects.bulk_update(rows, ['hot_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_tag_post_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(db_index=True, default=posts.ranking.initial_hot_score),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Like',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'post'), name='posts_like_once')],
+            },
+        ),
+        migrations.RunPython(score_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:38
+
+from django.db import migrations, models
+
+from posts.post_urls import url_key
+
+
+def fill_url_keys(apps, schema_editor):
+    # Where a URL was posted more than once, the oldest post keeps it
+    Post = apps.get_model('posts', 'Post')
+    seen = set()
+    keyed = []
+    posts = Post.objects.exclude(url=None).order_by('created', 'id').values_list('id', 'url')
+    for post_id, url in posts.iterator(chunk_size=2000):
+        key = url_key(url)
+        if key and key not in seen:
+            seen.add(key)
+            keyed.append(Post(id=post_id, url_key=key))
+    Post.objects.bulk_update(keyed, ['url_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='url_key',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(fill_url_keys, migrations.RunPython.noop),
+    ]
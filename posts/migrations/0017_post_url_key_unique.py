@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_url_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='url_key',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
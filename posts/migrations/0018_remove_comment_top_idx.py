@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_url_key_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comment_top_idx',
+        ),
+    ]
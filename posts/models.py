@@ -1,24 +1,177 @@
 from uuid import uuid4
+from django.conf import settings
 from django.db import models
 
+from .post_urls import url_key
+from .ranking import hot_score, initial_hot_score
+
+
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Only the columns a post card renders, with every tag on the page
+        loaded in one batched query instead of one per card"""
+        return self.only(
+            "id",
+            "title",
+            "artist",
+            "url",
+            "image",
+            "body",
+            "created",
+            "updated",
+            "status",
+            "like_count",
+            "comment_count",
+        ).prefetch_related(
+            models.Prefetch("tags", queryset=Tag.objects.only("name", "slug"))
+        )
+
+    def with_url(self, url):
+        """The post already made from this URL, one lookup on url_key"""
+        return self.filter(url_key=url_key(url))
+
+    def hot(self):
+        """Best ranked first, straight off the hot_score index"""
+        return self.only("id", "title", "artist", "image", "like_count").order_by("-hot_score")
+
 
 class Post(models.Model):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
     title = models.CharField(max_length=100)
     artist = models.CharField(max_length=100, null=True)
     url = models.URLField(null=True, max_length=500)
+    # See posts.post_urls. Only the first post of a URL has one, so reposts
+    # are turned away before scraping.
+    url_key = models.CharField(max_length=64, null=True, unique=True, editable=False)
     image = models.URLField(max_length=200)
     body = models.TextField()
     tags = models.ManyToManyField("Tag")
     created = models.DateTimeField(auto_now_add=True)
-    id = models.CharField(
-        max_length=100, default=uuid4, unique=True, primary_key=True, editable=False
-    )
+    updated = models.DateTimeField(auto_now=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=READY)
+    like_count = models.PositiveIntegerField(default=0)
+    # Comments and replies, kept current by posts.signals
+    comment_count = models.PositiveIntegerField(default=0)
+    # See posts.ranking, "Top Posts" reads the index in order
+    hot_score = models.FloatField(default=initial_hot_score, db_index=True)
+    id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return str(self.title)
 
+    @property
+    def card_version(self):
+        """Changes whenever the rendered card would, see posts.signals"""
+        return int(self.updated.timestamp() * 1_000_000)
+
+    def save(self, *args, **kwargs):
+        # The URL can't be edited, and older reposts keep their empty key
+        if self._state.adding:
+            self.url_key = url_key(self.url)
+        super().save(*args, **kwargs)
+
+    def rescore(self):
+        self.hot_score = hot_score(self.like_count, self.created)
+
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            # Matches FEED_ORDERING, so feed pages are read straight off the
+            # index instead of sorting the table
+            models.Index(fields=["-created", "-id"], name="posts_post_feed_idx"),
+            # Max("updated") for the feed's ETag, see posts.http_cache
+            models.Index(fields=["updated"], name="posts_post_updated_idx"),
+        ]
+
+
+class Like(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="likes")
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user} likes {self.post}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="posts_like_once")
+        ]
+
+
+class Comment(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments"
+    )
+    body = models.CharField(max_length=150)
+    like_count = models.PositiveIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.author} : {self.body[:30]}"
+
+    class Meta:
+        ordering = ["-created"]
+        indexes = [
+            # One per tab in posts.comments.COMMENT_ORDERINGS
+            models.Index(fields=["post", "-created", "-id"], name="posts_comment_newest_idx"),
+        ]
+
+
+class Reply(models.Model):
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name="replies")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="replies"
+    )
+    body = models.CharField(max_length=150)
+    like_count = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.author} : {self.body[:30]}"
+
+    class Meta:
+        ordering = ["created"]
+        verbose_name_plural = "replies"
+
+
+class ScrapeJob(models.Model):
+    """A queued fetch of a pending post's Flickr page, run by run_scrape_worker"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name="scrape_job")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(db_index=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.post_id} ({self.status})"
+
+    class Meta:
+        ordering = ["run_after"]
 
 
 class Tag(models.Model):
@@ -26,6 +179,11 @@ class Tag(models.Model):
     image = models.FileField(upload_to='icons/', null=True, blank=True)
     slug = models.SlugField(max_length=20, unique=True)
     order = models.IntegerField(null=True)
+    # Kept current by posts.tag_stats, `manage.py recount_tags` repairs drift
+    post_count = models.PositiveIntegerField(default=0)
+    latest_post = models.ForeignKey(
+        Post, null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name="+"
+    )
 
     def __str__(self):
         return self.name
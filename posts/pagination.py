@@ -0,0 +1,102 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+FEED_PAGE_SIZE = 10
+FEED_ORDERING = ("-created", "-id")
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values):
+    """Turn the sort key of the last row on a page into an opaque string"""
+    raw = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if not isinstance(values, list):
+        raise InvalidCursor("cursor must hold a list of values")
+    return values
+
+
+def _to_python(model, name, value):
+    # Every sort key is NOT NULL, and the ORM refuses None in a comparison
+    if value is None:
+        raise InvalidCursor(f"cursor has no value for {name}")
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:  # annotations such as a search rank
+        return value
+    try:
+        return field.to_python(value)
+    except (ValidationError, TypeError, ValueError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def _after(model, ordering, values):
+    """
+    Build the keyset filter for rows strictly after `values`, e.g. for
+    ("-created", "-id"): created <= c AND (created < c OR (created = c AND id < i))
+
+    The leading bound is redundant, but the OR alone can't be used as an
+    index range, so without it the scan starts from the first row.
+    """
+    seek = Q()
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        value = _to_python(model, name, value)
+        lookup = "lt" if field.startswith("-") else "gt"
+        if not seek:
+            seek = Q(**{f"{name}__{lookup}e": value})
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return seek & condition
+
+
+def _page_queryset(queryset, cursor, page_size, ordering):
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise InvalidCursor("cursor does not match the ordering")
+        queryset = queryset.filter(_after(queryset.model, ordering, values))
+    # One extra row tells whether there is a next page
+    return queryset[: page_size + 1]
+
+
+def _page(items, page_size, ordering):
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, field.lstrip("-")) for field in ordering]
+        )
+    return items, next_cursor
+
+
+def paginate(queryset, cursor=None, page_size=FEED_PAGE_SIZE, ordering=FEED_ORDERING):
+    """
+    Keyset pagination: returns (items, next_cursor). Each page is an indexed
+    range scan from the cursor, so page N costs the same as page 1.
+    """
+    items = list(_page_queryset(queryset, cursor, page_size, ordering))
+    return _page(items, page_size, ordering)
+
+
+async def apaginate(queryset, cursor=None, page_size=FEED_PAGE_SIZE, ordering=FEED_ORDERING):
+    """paginate() for async views, prefetches included"""
+    items = [item async for item in _page_queryset(queryset, cursor, page_size, ordering)]
+    return _page(items, page_size, ordering)
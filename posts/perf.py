@@ -0,0 +1,311 @@
+"""
+Per-request cost: wall time, queries, template rendering, Flickr fetches
+and cache hits, for a sample of requests. Sampled responses carry it in a
+Server-Timing header, and the latest samples per view are kept in memory
+for the percentiles at /admin/perf/.
+"""
+
+import contextvars
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+DEFAULT_PERF = {
+    "SAMPLE_RATE": 0.05,  # share of requests measured, 0 turns it off
+    "WINDOW": 1000,  # latest samples kept per view
+    "SERVER_TIMING": True,  # for staff only, see PerfMiddleware._finish
+}
+
+# Server-Timing metric names, in header order. "scrape" is every request
+# made to Flickr, page or image.
+TIMERS = ("db", "template", "scrape")
+
+_current = contextvars.ContextVar("perf_timings", default=None)
+
+
+def perf_settings():
+    return {**DEFAULT_PERF, **getattr(settings, "POSTS_PERF", {})}
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = None
+        self.durations = defaultdict(float)  # timer -> seconds
+        self.queries = 0
+        self.cache = defaultdict(lambda: [0, 0])  # cache name -> [hits, misses]
+        self._running = set()
+
+    def execute(self, execute, sql, params, many, context):
+        """Time one query, see _execute()"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations["db"] += time.perf_counter() - start
+            self.queries += 1
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def server_timing(self):
+        metrics = [f"total;dur={self.total * 1000:.1f}"]
+        for name in TIMERS:
+            if name in self.durations:
+                metric = f"{name};dur={self.durations[name] * 1000:.1f}"
+                if name == "db":
+                    metric += f';desc="{self.queries} queries"'
+                metrics.append(metric)
+        for name, (hits, misses) in sorted(self.cache.items()):
+            metrics.append(f'cache-{name};desc="{hits} hit {misses} miss"')
+        return ", ".join(metrics)
+
+
+def _execute(execute, sql, params, many, context):
+    """
+    execute_wrapper of every connection. Async views query from a worker
+    thread with a connection of its own, so the wrapper can't be installed
+    per request; it finds the request's timings in the context instead.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.execute(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def _install_execute(sender, connection, **kwargs):
+    # Fired again when the same connection reconnects
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's `name` timer"""
+    timings = _current.get()
+    # Nested blocks of the same timer (an include rendered through the
+    # backend inside a page) are already covered by the outer one
+    if timings is None or name in timings._running:
+        yield
+        return
+    timings._running.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - start
+        timings._running.discard(name)
+
+
+def record_cache(name, hit):
+    timings = _current.get()
+    if timings is not None:
+        timings.cache[name][0 if hit else 1] += 1
+
+
+_missing = object()
+
+
+def _instrument(cache, name):
+    """
+    Count hits and misses of one of the CACHES. get_or_set and the
+    {% cache %} tag go through get(), so wrapping get() and get_many()
+    covers them. Unsampled requests pay one contextvar lookup per call.
+    """
+    if getattr(cache, "_perf_instrumented", False):
+        return
+    get, get_many = cache.get, cache.get_many
+
+    def counted_get(key, default=None, version=None):
+        value = get(key, _missing, version=version)
+        record_cache(name, value is not _missing)
+        return default if value is _missing else value
+
+    def counted_get_many(keys, version=None):
+        keys = list(keys)
+        found = get_many(keys, version=version)
+        timings = _current.get()
+        if timings is not None:
+            timings.cache[name][0] += len(found)
+            timings.cache[name][1] += len(keys) - len(found)
+        return found
+
+    cache.get, cache.get_many = counted_get, counted_get_many
+    cache._perf_instrumented = True
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose top level renders count towards the template timer"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class PerfStats:
+    """The latest WINDOW samples of every view, for percentiles"""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def add(self, view, timings):
+        sample = (
+            timings.total,
+            timings.durations.get("db", 0.0),
+            timings.queries,
+            timings.durations.get("template", 0.0),
+            timings.durations.get("scrape", 0.0),
+            {name: tuple(counts) for name, counts in timings.cache.items()},
+        )
+        with self._lock:
+            self.samples[view].append(sample)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Per view: sample count, percentiles of each measure and cache hit rates"""
+        with self._lock:
+            samples = {view: list(rows) for view, rows in self.samples.items()}
+
+        rows = []
+        for view, view_samples in sorted(samples.items()):
+            columns = list(zip(*view_samples))
+            hits, misses = defaultdict(int), defaultdict(int)
+            for cache_counts in columns[5]:
+                for name, (cache_hits, cache_misses) in cache_counts.items():
+                    hits[name] += cache_hits
+                    misses[name] += cache_misses
+            rows.append(
+                {
+                    "view": view,
+                    "count": len(view_samples),
+                    "total": _percentiles(columns[0], percentiles, 1000),
+                    "db": _percentiles(columns[1], percentiles, 1000),
+                    "queries": _percentiles(columns[2], percentiles),
+                    "template": _percentiles(columns[3], percentiles, 1000),
+                    "scrape": _percentiles(columns[4], percentiles, 1000),
+                    "cache": {
+                        name: hits[name] / (hits[name] + misses[name])
+                        for name in sorted(hits)
+                        if hits[name] + misses[name]
+                    },
+                }
+            )
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self.samples.clear()
+
+
+def _percentiles(values, percentiles, scale=1):
+    """Nearest rank percentiles, scaled (seconds to ms)"""
+    values = sorted(values)
+    return [
+        round(values[max(0, -(-p * len(values) // 100) - 1)] * scale, 1)
+        for p in percentiles
+    ]
+
+
+def connection_stats():
+    """How each database connects, with psycopg_pool's counters for pools"""
+    stats = []
+    for connection in connections.all():
+        pool = getattr(connection, "pool", None)  # the PostgreSQL backend's
+        stats.append(
+            {
+                "alias": connection.alias,
+                "vendor": connection.vendor,
+                "max_age": connection.settings_dict["CONN_MAX_AGE"],
+                "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+                "pool": pool.get_stats() if pool else None,
+            }
+        )
+    return stats
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_stats():
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = PerfStats(perf_settings()["WINDOW"])
+    return _stats
+
+
+class PerfMiddleware:
+    """
+    Measures a SAMPLE_RATE share of requests. Put it first in MIDDLEWARE so
+    the wall time covers the other middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = perf_settings()
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.server_timing = config["SERVER_TIMING"]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self):
+        timings = RequestTimings()
+        stack = ExitStack()
+        for alias in settings.CACHES:
+            _instrument(caches[alias], alias)
+        stack.callback(_current.reset, _current.set(timings))
+        return timings, stack
+
+    def _finish(self, request, response, timings, user):
+        timings.finish()
+        match = request.resolver_match
+        get_stats().add(match.view_name if match else "unresolved", timings)
+        # Staff only: anonymous pages are cached by proxies, which would hand
+        # one request's timings to everyone, and the costs are internal
+        if self.server_timing and getattr(user, "is_staff", False):
+            response["Server-Timing"] = timings.server_timing()
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        timings, stack = self._start()
+        with stack:
+            response = self.get_response(request)
+        return self._finish(request, response, timings, getattr(request, "user", None))
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        timings, stack = self._start()
+        with stack:
+            response = await self.get_response(request)
+        # request.user would query the session from the event loop
+        user = await request.auser() if hasattr(request, "auser") else None
+        return self._finish(request, response, timings, user)
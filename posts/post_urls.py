@@ -0,0 +1,22 @@
+import hashlib
+
+
+def normalize_url(url):
+    """Ensure the URL has a valid scheme (http/https)"""
+    url = url.strip()
+    if url and not url.startswith(("http://", "https://")):
+        url = "https://" + url  # Default to https
+    return url
+
+
+def url_key(url):
+    """
+    Post.url_key: a fixed-width digest of the normalized URL, so the unique
+    index stays small however long the URLs get. The scheme is left out, as
+    the form's URLField gives a bare host http:// where normalize_url would
+    give it https://.
+    """
+    if not url:
+        return None
+    _, address = normalize_url(url).split("://", 1)
+    return hashlib.sha256(address.encode()).hexdigest()
@@ -0,0 +1,19 @@
+import math
+
+from django.utils import timezone
+
+# A post needs twice the likes (plus one) to rank level with one posted this much later.
+# Baking the age into the score this way keeps rankings stable as time passes,
+# so a score only changes when its post is liked and never needs a sweep.
+HOT_HALF_LIFE = 12 * 60 * 60
+
+TOP_POSTS = 5
+
+
+def hot_score(likes, created):
+    return math.log2(1 + likes) + created.timestamp() / HOT_HALF_LIFE
+
+
+def initial_hot_score():
+    """Default for new posts, which have no likes and are created about now"""
+    return hot_score(0, timezone.now())
@@ -0,0 +1,126 @@
+"""
+Send the feed's and post page's reads to DATABASE_REPLICAS. Everything
+else, and every read after a write, uses the primary. A client that wrote
+keeps reading from the primary for DATABASE_REPLICA_PIN_SECONDS, so the
+page it is redirected to shows its change even while the replicas lag.
+"""
+
+import contextvars
+import functools
+import random
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = "primary_db"
+
+_routing = contextvars.ContextVar("replica_routing", default=None)
+
+
+class Routing:
+    """Where the current request may read from"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned  # reads stay on the primary
+        self.wrote = False
+        self.replica_reads = False  # set by @replica_reads views
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        replicas = settings.DATABASE_REPLICAS
+        if routing is None or not routing.replica_reads or routing.pinned or not replicas:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.pinned = routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+def replica_reads(view):
+    """Let the view's queries go to a replica, until it writes"""
+
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            with _reading_replicas():
+                return await view(request, *args, **kwargs)
+
+    else:
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with _reading_replicas():
+                return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def _reading_replicas():
+    routing = _routing.get()
+    if routing is None:  # outside ReplicaPinMiddleware, e.g. a management command
+        yield
+        return
+    routing.replica_reads = True
+    try:
+        yield
+    finally:
+        routing.replica_reads = False
+
+
+class ReplicaPinMiddleware:
+    """
+    Tracks writes made while handling a request and pins the client to the
+    primary after one. Goes above SessionMiddleware so session saves count.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = Routing(pinned=PIN_COOKIE in request.COOKIES)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self._pin(routing, response)
+
+    async def __acall__(self, request):
+        routing = Routing(pinned=PIN_COOKIE in request.COOKIES)
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self._pin(routing, response)
+
+    def _pin(self, routing, response):
+        if routing.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,127 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .perf import record_cache
+
+DEFAULT_SCRAPE_CACHE = {
+    "BACKEND": "local",  # or "django" to share entries between processes
+    "TTL": 60 * 60,
+    "MAX_ENTRIES": 1000,
+    "CACHE_ALIAS": "shared",  # "default" is per process
+}
+
+NAMESPACE_KEY = "scrape:namespace"
+
+
+def cache_key(url):
+    """Keys are the URL as clean_url left it, hashed to fit any cache backend"""
+    return "scrape:" + hashlib.sha256(url.strip().encode()).hexdigest()
+
+
+class BaseScrapeCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url):
+        data = self._get(cache_key(url))
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        record_cache("scrape", data is not None)
+        return data
+
+    def set(self, url, data):
+        self._set(cache_key(url), data)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class LocalScrapeCache(BaseScrapeCache):
+    """In-process LRU with a TTL, good enough for a single worker"""
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, ttl, max_entries):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def _set(self, key, data):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoScrapeCache(BaseScrapeCache):
+    """
+    Entries live in one of the CACHES, so every process shares them. Size is
+    bounded by that cache's own MAX_ENTRIES/eviction policy.
+    """
+
+    def __init__(self, ttl, alias="shared"):
+        super().__init__(ttl)
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _namespace(self):
+        # The cache can't list the scrape: keys, so each carries this as its
+        # version and clear() moves it on. Old entries expire with their TTL.
+        return self.cache.get_or_set(NAMESPACE_KEY, time.time_ns, None)
+
+    def _get(self, key):
+        return self.cache.get(key, version=self._namespace())
+
+    def _set(self, key, data):
+        self.cache.set(key, data, self.ttl, version=self._namespace())
+
+    def clear(self):
+        """Forget the scraped pages, leaving the alias's other keys alone"""
+        self.cache.set(NAMESPACE_KEY, time.time_ns(), None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_scrape_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = {**DEFAULT_SCRAPE_CACHE, **getattr(settings, "SCRAPE_CACHE", {})}
+                if config["BACKEND"] == "django":
+                    _cache = DjangoScrapeCache(config["TTL"], config["CACHE_ALIAS"])
+                else:
+                    _cache = LocalScrapeCache(config["TTL"], config["MAX_ENTRIES"])
+    return _cache
@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "awesome-scraper/1.0"
+
+# When a streamed read stops early, reading this much more to keep the
+# connection alive is cheaper than opening a new one
+DRAIN_LIMIT = 64 * 1024
+
+
+class TrackedBody:
+    """Iterates a response body in chunks, keeping what has been read"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.read = []
+        self.exhausted = False
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.read.append(chunk)
+            yield chunk
+        self.exhausted = True
+
+
+class ScrapeClient:
+    """
+    Shared HTTP client for scraping Flickr.
+
+    All threads go through one connection pool so TCP+TLS connections are
+    kept alive and reused between submissions. Each thread gets its own
+    Session (Sessions aren't thread-safe, the pool underneath is), the number
+    of requests in flight per host is capped, and pages we've seen before are
+    revalidated with If-None-Match/If-Modified-Since.
+    """
+
+    def __init__(self, pool_size=10, per_host_limit=4, max_validators=1000):
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.per_host_limit = per_host_limit
+        self.max_validators = max_validators
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self._validators = OrderedDict()
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            self._local.session = session
+        return session
+
+    @contextmanager
+    def host_slot(self, url):
+        """Block until fewer than per_host_limit requests are running for the host"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(
+                    self.per_host_limit
+                )
+        with slot:
+            yield
+
+    def _conditional_headers(self, url, partial_ok=False):
+        with self._lock:
+            cached = self._validators.get(url)
+        # A streamed read may have stored only the start of the page
+        if cached is None or not (cached["complete"] or partial_ok):
+            return {}, None
+        headers = {}
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+        return headers, cached
+
+    def _remember(self, url, response, content, complete=True):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return
+        with self._lock:
+            self._validators[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content": content,
+                "complete": complete,
+            }
+            self._validators.move_to_end(url)
+            while len(self._validators) > self.max_validators:
+                self._validators.popitem(last=False)
+
+    def get(self, url, remember=True, **kwargs):
+        """
+        remember=False skips revalidation and keeps no copy of the body, for
+        downloads the caller stores itself, such as images.
+        """
+        headers, cached = self._conditional_headers(url) if remember else ({}, None)
+        headers.update(kwargs.pop("headers", None) or {})
+
+        with self.host_slot(url):
+            response = self.session.get(url, headers=headers, **kwargs)
+
+            if response.status_code == 304 and cached is not None:
+                # Not modified: serve the body we stored with the validators
+                response.status_code = 200
+                response._content = cached["content"]
+                response.from_revalidation = True
+            else:
+                response.from_revalidation = False
+                if response.ok and remember:
+                    self._remember(url, response, response.content)
+        return response
+
+    @contextmanager
+    def stream(self, url, chunk_size=16 * 1024, **kwargs):
+        """
+        Yield (response, body) where body iterates the page in chunks, so the
+        caller can stop reading as soon as it has what it needs. Revalidation
+        works on whatever part of the page was read last time.
+        """
+        headers, cached = self._conditional_headers(url, partial_ok=True)
+        headers.update(kwargs.pop("headers", None) or {})
+
+        with self.host_slot(url):
+            response = self.session.get(url, headers=headers, stream=True, **kwargs)
+            try:
+                if response.status_code == 304 and cached is not None:
+                    response.status_code = 200
+                    response.from_revalidation = True
+                    body = TrackedBody(iter([cached["content"]]))
+                else:
+                    response.from_revalidation = False
+                    body = TrackedBody(response.iter_content(chunk_size))
+
+                yield response, body
+
+                if response.ok and not response.from_revalidation:
+                    self._remember(url, response, b"".join(body.read), body.exhausted)
+            finally:
+                self._release(response, body)
+
+    def _release(self, response, body):
+        if not body.exhausted and not response.from_revalidation:
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit():
+                remaining = int(length) - response.raw.tell()
+                if 0 <= remaining <= DRAIN_LIMIT:
+                    for _ in body:
+                        pass
+        # Returns a fully read connection to the pool, drops a half read one
+        response.close()
+
+    def close(self):
+        self.adapter.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client, built from settings on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ScrapeClient(
+                    pool_size=getattr(settings, "SCRAPE_POOL_SIZE", 10),
+                    per_host_limit=getattr(settings, "SCRAPE_PER_HOST_LIMIT", 4),
+                )
+    return _client
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """
+    httpx client for async views, one per event loop since its connections
+    belong to the loop they were opened on. Needs httpx installed.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool_size = getattr(settings, "SCRAPE_POOL_SIZE", 10)
+        client = _async_clients[loop] = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+    return client
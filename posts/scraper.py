@@ -0,0 +1,162 @@
+import codecs
+from html.parser import HTMLParser
+
+from asgiref.sync import sync_to_async
+from requests.exceptions import RequestException
+
+from .perf import timed
+from .scrape_cache import get_scrape_cache
+from .scrape_client import get_async_client, get_client
+
+try:
+    import httpx
+except ImportError:  # ascrape_post_data runs the sync fetch in a thread instead
+    httpx = None
+
+SCRAPE_TIMEOUT = 5
+
+
+class ScrapeError(Exception):
+    """The page was fetched but holds no usable Flickr image"""
+
+
+def scrape_post_data(url):
+    """
+    Pull out what a post needs from a Flickr photo page, fetching it only if
+    nobody submitted the same URL recently.
+    Network problems surface as requests' RequestException.
+    """
+    cache = get_scrape_cache()
+    data = cache.get(url)
+    if data is None:
+        data = _fetch_post_data(url)
+        cache.set(url, data)
+    return data
+
+
+def _fetch_post_data(url):
+    with timed("scrape"), get_client().stream(url, timeout=SCRAPE_TIMEOUT) as (website, body):
+        website.raise_for_status()  # Raise error for bad responses (e.g., 404, 500)
+        return extract_post_data(body, website.encoding)
+
+
+async def ascrape_post_data(url):
+    """
+    scrape_post_data for async views, awaiting the page instead of holding
+    a thread while Flickr answers. Errors are raised the same way.
+    """
+    cache = get_scrape_cache()
+    data = await sync_to_async(cache.get, thread_sensitive=False)(url)
+    if data is None:
+        if httpx is None:
+            data = await sync_to_async(_fetch_post_data, thread_sensitive=False)(url)
+        else:
+            data = await _afetch_post_data(url)
+        await sync_to_async(cache.set, thread_sensitive=False)(url, data)
+    return data
+
+
+async def _afetch_post_data(url):
+    try:
+        with timed("scrape"):
+            async with get_async_client().stream("GET", url, timeout=SCRAPE_TIMEOUT) as website:
+                website.raise_for_status()
+                parser = FlickrPageParser()
+                decoder = _decoder(website.encoding)
+                async for chunk in website.aiter_bytes(16 * 1024):
+                    if _feed(parser, decoder, chunk):
+                        break
+                else:
+                    _close(parser, decoder)
+    except httpx.HTTPError as e:
+        raise RequestException(str(e)) from e
+    return _post_data(parser)
+
+
+class FlickrPageParser(HTMLParser):
+    """
+    Event-based parser that picks the og-image, h1.photo-title and
+    a.owner-name out of a Flickr page as it streams past, without building
+    a tree of the whole document.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.image = None
+        self.title = None
+        self.artist = None
+        self._capture = None  # (field, tag, depth, text parts)
+
+    @property
+    def done(self):
+        return None not in (self.image, self.title, self.artist)
+
+    def handle_starttag(self, tag, attrs):
+        if self._capture:
+            if tag == self._capture[1]:
+                self._capture[2] += 1
+            return
+
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag == "meta" and self.image is None:
+            content = attrs.get("content") or ""
+            if content.startswith("https://live.staticflickr.com/"):
+                self.image = content
+        elif tag == "h1" and self.title is None and "photo-title" in classes:
+            self._capture = ["title", tag, 1, []]
+        elif tag == "a" and self.artist is None and "owner-name" in classes:
+            self._capture = ["artist", tag, 1, []]
+
+    def handle_endtag(self, tag):
+        if self._capture and tag == self._capture[1]:
+            self._capture[2] -= 1
+            if self._capture[2] == 0:
+                field, _, _, parts = self._capture
+                setattr(self, field, "".join(parts).strip())
+                self._capture = None
+
+    def handle_data(self, data):
+        if self._capture:
+            self._capture[3].append(data)
+
+
+def _decoder(encoding):
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _feed(parser, decoder, chunk):
+    """Returns True once the parser has everything"""
+    parser.feed(decoder.decode(chunk))
+    return parser.done
+
+
+def _close(parser, decoder):
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+
+
+def extract_post_data(chunks, encoding=None):
+    """Feed the page to FlickrPageParser chunk by chunk, stop once it has everything"""
+    parser = FlickrPageParser()
+    decoder = _decoder(encoding)
+    for chunk in chunks:
+        if _feed(parser, decoder, chunk):
+            break
+    else:
+        _close(parser, decoder)
+    return _post_data(parser)
+
+
+def _post_data(parser):
+    if parser.image is None:
+        raise ScrapeError("No valid image found on the page.")
+
+    return {
+        "image": parser.image,
+        "title": "Untitled" if parser.title is None else parser.title,
+        "artist": "Unknown" if parser.artist is None else parser.artist,
+    }
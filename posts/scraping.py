@@ -0,0 +1,32 @@
+"""
+The scraping stack, loaded on first use. requests, httpx and the page
+parser take longer to import than the rest of the app's modules together,
+and only post creation, the scrape worker and image misses need them. So
+views, jobs and images reach them through here, as scraping.<name>, and
+workers, management commands and test runs that never fetch a page don't
+import them at all.
+"""
+
+from importlib import import_module
+
+_NAMES = {
+    "scrape_post_data": ".scraper",
+    "ascrape_post_data": ".scraper",
+    "ScrapeError": ".scraper",
+    "get_client": ".scrape_client",
+    "get_async_client": ".scrape_client",
+    "RequestException": "requests.exceptions",
+    "HTTPError": "requests.exceptions",
+}
+
+
+def __getattr__(name):
+    try:
+        module = _NAMES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    return getattr(import_module(module, __package__), name)
+
+
+def __dir__():
+    return [*globals(), *_NAMES]
@@ -0,0 +1,181 @@
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .pagination import FEED_PAGE_SIZE, InvalidCursor, decode_cursor, encode_cursor, paginate
+
+SEARCH_ORDERING = ("-rank", "-created", "-id")
+
+# Title matches count most, then the artist, then the caption. Same order as
+# the setweight() A/B/C in migration 0009 for Postgres.
+FIELD_WEIGHTS = {"title": 3.0, "artist": 2.0, "body": 1.0}
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def search_posts(query, tag=None, cursor=None, page_size=FEED_PAGE_SIZE):
+    """
+    Ranked search over title, artist and caption, paged with the feed's
+    keyset cursors. Returns (posts, next_cursor).
+    """
+    if connection.vendor == "postgresql":
+        return _search_postgres(query, tag, cursor, page_size)
+    return _search_in_process(query, tag, cursor, page_size)
+
+
+def _search_postgres(query, tag, cursor, page_size):
+    # search_vector is a generated tsvector column with a GIN index, see
+    # migration 0009. The model doesn't know about it, hence the raw SQL.
+    tsquery = "websearch_to_tsquery('english', %s)"
+    posts = (
+        Post.objects.feed()
+        .filter(RawSQL(f"posts_post.search_vector @@ {tsquery}", [query], BooleanField()))
+        .annotate(
+            # float8 so the rank survives the round trip through a cursor
+            rank=RawSQL(
+                f"ts_rank(posts_post.search_vector, {tsquery})::float8",
+                [query],
+                FloatField(),
+            )
+        )
+    )
+    if tag:
+        posts = posts.filter(tags__slug=tag)
+    return paginate(posts, cursor, page_size, ordering=SEARCH_ORDERING)
+
+
+class InvertedIndex:
+    """
+    Term -> {post id: weight} postings for databases without full-text
+    search. Built from the table on first use, then every search catches up
+    on posts whose Post.updated moved since, whichever process saved them.
+    """
+
+    # Rows committed slightly out of order of their `updated` stamp are
+    # still picked up by the next sync
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.docs = {}  # post id -> (terms, created timestamp)
+        self.synced_until = None
+        self._lock = threading.RLock()
+
+    def add(self, post_id, created, **fields):
+        weights = defaultdict(float)
+        for name, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(name)):
+                weights[term] += weight
+        with self._lock:
+            self.remove(post_id)
+            for term, weight in weights.items():
+                self.postings[term][post_id] = weight
+            self.docs[post_id] = (set(weights), created.timestamp())
+
+    def remove(self, post_id):
+        with self._lock:
+            terms, _ = self.docs.pop(post_id, (set(), None))
+            for term in terms:
+                self.postings[term].pop(post_id, None)
+                if not self.postings[term]:
+                    del self.postings[term]
+
+    def sync(self):
+        """Catch up with writes made outside this process"""
+        with self._lock:
+            posts = Post.objects.all()
+            if self.synced_until is not None:
+                posts = posts.filter(updated__gte=self.synced_until - self.SYNC_OVERLAP)
+            rows = posts.values("id", "created", "updated", *FIELD_WEIGHTS)
+            for row in rows.iterator():
+                self.add(row.pop("id"), row.pop("created"), **row)
+                if self.synced_until is None or row["updated"] > self.synced_until:
+                    self.synced_until = row["updated"]
+
+            # Deletes leave no row behind to notice, so compare sizes
+            if Post.objects.count() != len(self.docs):
+                live = set(Post.objects.values_list("id", flat=True))
+                for post_id in set(self.docs) - live:
+                    self.remove(post_id)
+
+    def search(self, query, after=None, limit=None, within=None):
+        """
+        Posts matching every term, best first, as (score, created, id).
+        `after` skips hits up to a previous page's last one, `within` keeps
+        only the given post ids, and `limit` stops at that many.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            postings = [self.postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+            total = len(self.docs)
+            postings.sort(key=len)
+            idf = [math.log(1 + total / len(p)) for p in postings]
+            hits = []
+            for post_id in postings[0]:
+                if within is not None and post_id not in within:
+                    continue
+                if all(post_id in p for p in postings[1:]):
+                    score = sum(p[post_id] * w for p, w in zip(postings, idf))
+                    hit = (score, self.docs[post_id][1], post_id)
+                    if after is None or hit < after:
+                        hits.append(hit)
+        if limit is None:
+            return sorted(hits, reverse=True)
+        return heapq.nlargest(limit, hits)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = InvertedIndex()
+    return _index
+
+
+def _search_in_process(query, tag, cursor, page_size):
+    index = get_index()
+    index.sync()
+
+    after = None
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 3:
+            raise InvalidCursor("cursor does not match the ordering")
+        try:
+            after = (values[0], values[1], Post._meta.pk.to_python(values[2]))
+        except ValidationError as e:
+            raise InvalidCursor(str(e)) from e
+    within = None
+    if tag:
+        within = set(Post.objects.filter(tags__slug=tag).values_list("id", flat=True))
+
+    try:
+        hits = index.search(query, after, page_size + 1, within)
+    except TypeError as e:  # a cursor whose values don't compare with ours
+        raise InvalidCursor(str(e)) from e
+
+    page = hits[:page_size]
+    posts = Post.objects.feed().in_bulk([post_id for _, _, post_id in page])
+    next_cursor = encode_cursor(list(page[-1])) if len(hits) > page_size else None
+    return [posts[post_id] for _, _, post_id in page if post_id in posts], next_cursor
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+
+from .models import Post, Tag
+from .ranking import TOP_POSTS
+
+GENERATION_KEY = "posts:tag-generation"
+
+_lock = threading.Lock()
+_categories = (None, [])  # (generation, categories)
+_rendered = {}  # (generation, active tag slug) -> html
+
+
+def tag_generation():
+    """
+    Counter bumped whenever a Tag changes, kept in CACHES["shared"] so web
+    workers, the scrape worker and management commands all see each bump.
+    Every process compares it with the generation its copy was built from,
+    so one cache read per request replaces the Tag query.
+    """
+    return caches["shared"].get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def bump_tag_generation():
+    shared = caches["shared"]
+    try:
+        shared.incr(GENERATION_KEY)
+    except ValueError:  # evicted or never set, any fresh value will do
+        shared.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def get_categories():
+    global _categories
+    generation = tag_generation()
+    cached_generation, categories = _categories
+    if cached_generation != generation:
+        categories = [
+            {
+                "name": tag.name,
+                "slug": tag.slug,
+                "image_url": tag.image.url if tag.image else "",
+                "post_count": tag.post_count,
+                "latest": tag.latest_post.created if tag.latest_post else None,
+            }
+            for tag in Tag.objects.select_related("latest_post").only(
+                "name", "slug", "image", "post_count", "latest_post__created"
+            )
+        ]
+        with _lock:
+            _categories = (generation, categories)
+    return categories
+
+
+def render_categories(active_slug):
+    """The categories section as HTML, rendered once per generation and active tag"""
+    generation = tag_generation()
+    key = (generation, active_slug)
+    html = _rendered.get(key)
+    if html is None:
+        html = render_to_string(
+            "includes/sidebar_categories.html",
+            {"categories": get_categories(), "tag": {"slug": active_slug}},
+        )
+        with _lock:
+            for stale in [k for k in _rendered if k[0] != generation]:
+                del _rendered[stale]
+            _rendered[key] = html
+    return html
+
+
+def sidebar_context(tag=None):
+    slug = tag.slug if tag else None
+    context = {"top_posts": list(Post.objects.hot()[:TOP_POSTS])}
+    if getattr(settings, "POSTS_SIDEBAR_PRERENDER", False):
+        context["categories_html"] = render_categories(slug)
+    else:
+        context["categories"] = get_categories()
+    return context
@@ -0,0 +1,177 @@
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Comment, Post, Reply, Tag
+from .sidebar import bump_tag_generation
+from .tag_stats import count_added, count_removed, linked_counts
+
+
+_bulk = contextvars.ContextVar("posts_bulk_change", default=False)
+
+
+@contextmanager
+def bulk_change():
+    """
+    Turn off the @per_row receivers below, for posts.bulk, which redoes
+    their bookkeeping once per batch instead of once per row
+    """
+    token = _bulk.set(True)
+    try:
+        yield
+    finally:
+        _bulk.reset(token)
+
+
+def per_row(receiver_func):
+    @functools.wraps(receiver_func)
+    def wrapper(*args, **kwargs):
+        if not _bulk.get():
+            return receiver_func(*args, **kwargs)
+
+    return wrapper
+
+
+def card_key(post_id, version):
+    """Key of the {% cache %} fragment in posts/post.html"""
+    return make_template_fragment_key("post_card", [post_id, version])
+
+
+def touch_posts(post_ids):
+    """Drop the cached cards of these posts and give them a new version"""
+    posts = Post.objects.filter(pk__in=post_ids).only("id", "updated")
+    cache.delete_many([card_key(post.id, post.card_version) for post in posts])
+    Post.objects.filter(pk__in=post_ids).update(updated=timezone.now())
+
+
+@receiver(pre_save, sender=Post)
+def drop_edited_card(sender, instance, **kwargs):
+    # Still the old stamp here, auto_now only sets the new one while saving
+    if instance.updated and "updated" not in instance.get_deferred_fields():
+        cache.delete(card_key(instance.id, instance.card_version))
+
+
+@receiver(post_delete, sender=Post)
+@per_row
+def drop_deleted_card(sender, instance, **kwargs):
+    if instance.updated and "updated" not in instance.get_deferred_fields():
+        cache.delete(card_key(instance.id, instance.card_version))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def drop_retagged_cards(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch_posts([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        touch_posts(pk_set)
+    elif action == "pre_clear":
+        # tag.post_set.clear() doesn't say which posts it took the tag from
+        instance._cleared_post_ids = list(instance.post_set.values_list("id", flat=True))
+    elif action == "post_clear":
+        touch_posts(instance.__dict__.pop("_cleared_post_ids", []))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_add":
+        if reverse:
+            count_added([instance.pk], pk_set)
+        else:
+            count_added(pk_set, [instance.pk])
+    elif action in ("pre_remove", "pre_clear"):
+        # Count what is actually linked before the rows go. clear() sends no pk_set.
+        if reverse:
+            post_ids = pk_set
+            if post_ids is None:
+                post_ids = instance.post_set.values_list("id", flat=True)
+            post_ids = list(post_ids)
+            counts = linked_counts([instance.pk], post_ids)
+        else:
+            tag_ids = pk_set
+            if tag_ids is None:
+                tag_ids = instance.tags.values_list("id", flat=True)
+            post_ids = [instance.pk]
+            counts = linked_counts(list(tag_ids), post_ids)
+        instance._unlinked_tag_stats = (counts, post_ids)
+    elif action in ("post_remove", "post_clear"):
+        count_removed(*instance.__dict__.pop("_unlinked_tag_stats", ({}, [])))
+
+
+@receiver(pre_delete, sender=Post)
+@per_row
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    # The through rows are gone by post_delete
+    instance._unlinked_tag_stats = (
+        {tag_id: 1 for tag_id in instance.tags.values_list("id", flat=True)},
+        [instance.pk],
+    )
+
+
+@receiver(post_delete, sender=Post)
+@per_row
+def update_deleted_post_tag_stats(sender, instance, **kwargs):
+    count_removed(*instance.__dict__.pop("_unlinked_tag_stats", ({}, [])))
+
+
+@receiver(post_save, sender=Tag)
+def drop_renamed_tag_cards(sender, instance, created, **kwargs):
+    if not created:
+        touch_posts(list(instance.post_set.values_list("id", flat=True)))
+
+
+@receiver(pre_delete, sender=Tag)
+def drop_deleted_tag_cards(sender, instance, **kwargs):
+    touch_posts(list(instance.post_set.values_list("id", flat=True)))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Post)
+@per_row
+def refresh_sidebar(sender, **kwargs):
+    # After commit, or another process could reload the old rows under the new generation.
+    # Deleted posts too: the feed's ETag has no other way to notice them.
+    transaction.on_commit(bump_tag_generation)
+
+
+def _count_comment(posts, delta):
+    # A new `updated` re-renders the card with the new count
+    posts.update(
+        comment_count=F("comment_count") + delta, updated=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        _count_comment(Post.objects.filter(pk=instance.post_id), 1)
+
+
+@receiver(post_delete, sender=Comment)
+@per_row
+def count_deleted_comment(sender, instance, **kwargs):
+    # Its replies were deleted first and took themselves off the count
+    _count_comment(Post.objects.filter(pk=instance.post_id), -1)
+
+
+@receiver(post_save, sender=Reply)
+def count_new_reply(sender, instance, created, **kwargs):
+    if created:
+        Comment.objects.filter(pk=instance.comment_id).update(reply_count=F("reply_count") + 1)
+        _count_comment(Post.objects.filter(comments=instance.comment_id), 1)
+
+
+@receiver(post_delete, sender=Reply)
+@per_row
+def count_deleted_reply(sender, instance, **kwargs):
+    Comment.objects.filter(pk=instance.comment_id).update(reply_count=F("reply_count") - 1)
+    _count_comment(Post.objects.filter(comments=instance.comment_id), -1)
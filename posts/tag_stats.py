@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Post, Tag
+from .pagination import FEED_ORDERING
+from .sidebar import bump_tag_generation
+
+# Tag.post_count and Tag.latest_post, kept current from the m2m_changed and
+# delete signals in posts.signals. Every change runs inside the transaction
+# that links or unlinks the posts, and the sidebar refreshes once it commits.
+
+
+def _newer_than(post):
+    """Tags whose latest post is missing or older than `post`"""
+    return (
+        Q(latest_post__isnull=True)
+        | Q(latest_post__created__lt=post.created)
+        | Q(latest_post__created=post.created, latest_post__id__lt=post.id)
+    )
+
+
+def count_added(tag_ids, post_ids):
+    """Every post in post_ids was just tagged with every tag in tag_ids"""
+    if not tag_ids or not post_ids:
+        return
+    tags = Tag.objects.filter(pk__in=tag_ids)
+    tags.update(post_count=F("post_count") + len(post_ids))
+    newest = (
+        Post.objects.filter(pk__in=post_ids).order_by(*FEED_ORDERING).only("created").first()
+    )
+    if newest is not None:
+        tags.filter(_newer_than(newest)).update(latest_post=newest)
+    transaction.on_commit(bump_tag_generation)
+
+
+def linked_counts(tag_ids, post_ids):
+    """{tag id: how many of post_ids carry it}, taken before an unlink"""
+    links = Post.tags.through.objects.filter(tag_id__in=tag_ids, post_id__in=post_ids)
+    return dict(links.values_list("tag").annotate(n=Count("pk")).order_by())
+
+
+def count_removed(counts, post_ids):
+    """
+    Undo count_added for links that are gone. `counts` comes from
+    linked_counts, as remove() doesn't say which of the links existed.
+    """
+    if not counts:
+        return
+    for tag_id, n in counts.items():
+        # A counter that drifted low stops at 0 rather than failing the
+        # column's CHECK (post_count >= 0); recount_tags repairs it
+        Tag.objects.filter(pk=tag_id).update(post_count=Greatest(F("post_count") - n, 0))
+    # Only tags whose latest post lost the tag need to look for a new one
+    stale = Tag.objects.filter(pk__in=counts).filter(
+        Q(latest_post__in=post_ids) | Q(latest_post__isnull=True)
+    )
+    stale.update(latest_post=_latest_post())
+    transaction.on_commit(bump_tag_generation)
+
+
+def _latest_post():
+    return Subquery(
+        Post.objects.filter(tags=OuterRef("pk")).order_by(*FEED_ORDERING).values("pk")[:1]
+    )
+
+
+def recount_tags(tag_ids=None):
+    """
+    Recompute the stats from posts_post_tags, for after bulk writes that
+    skip the signals and to repair drift. Returns the number of tags updated.
+    """
+    tags = Tag.objects.all() if tag_ids is None else Tag.objects.filter(pk__in=tag_ids)
+    links = Post.tags.through.objects.filter(tag=OuterRef("pk"))
+    updated = tags.update(
+        post_count=Coalesce(
+            Subquery(links.values("tag").annotate(n=Count("pk")).values("n")), 0
+        ),
+        latest_post=_latest_post(),
+    )
+    transaction.on_commit(bump_tag_generation)
+    return updated
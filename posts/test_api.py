@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .api import API_FIELDS
+from .models import Post
+from .pagination import FEED_PAGE_SIZE, encode_cursor
+
+
+@pytest.fixture
+def posts(tags):
+    """Fixture to create more tagged posts than fit on one page."""
+    posts = []
+    for i in range(FEED_PAGE_SIZE + 2):
+        post = Post.objects.create(
+            title=f"Post {i}",
+            artist="Jane Doe",
+            url=f"https://flickr.com/photos/{i}/",
+            image="https://example.com/image.jpg",
+            body="Test content",
+        )
+        post.tags.add(*tags[: i % 2 + 1])
+        posts.append(post)
+    return posts
+
+
+def test_feed_pages(client, posts):
+    """Test the feed walks every post once, newest first, with every field by default"""
+    response = client.get(reverse("api-feed"))
+    page = response.json()
+    assert len(page["posts"]) == FEED_PAGE_SIZE
+    assert tuple(page["posts"][0]) == API_FIELDS
+    assert b", " not in response.content and b": " not in response.content
+
+    rest = client.get(reverse("api-feed"), {"cursor": page["next_cursor"]}).json()
+    assert rest["next_cursor"] is None
+    titles = [post["title"] for post in page["posts"] + rest["posts"]]
+    assert titles == [post.title for post in reversed(posts)]
+
+
+def test_sparse_fields(client, posts):
+    """Test fields= decides both the payload and the columns loaded"""
+    with CaptureQueriesContext(connection) as queries:
+        page = client.get(reverse("api-feed"), {"fields": "title,image"}).json()
+    assert set(page["posts"][0]) == {"id", "title", "image"}
+    feed_query = next(q["sql"] for q in queries if "LIMIT" in q["sql"])
+    assert '"posts_post"."body"' not in feed_query
+    assert '"posts_post"."title"' in feed_query
+
+    # The ordering columns are loaded for the cursor even when not asked for
+    rest = client.get(reverse("api-feed"), {"fields": "title", "cursor": page["next_cursor"]})
+    assert len(rest.json()["posts"]) == 2
+
+
+def test_expand_tags(client, posts, django_assert_num_queries):
+    """Test the tags of a whole page come from one query"""
+    with django_assert_num_queries(3):  # ETag stamps, posts, tags
+        page = client.get(reverse("api-feed"), {"fields": "title", "expand": "tags"}).json()
+    newest = page["posts"][0]
+    assert newest["tags"] == [
+        {"slug": "nature", "name": "Nature"},
+        {"slug": "urban", "name": "Urban"},
+    ]
+    assert "tags" not in client.get(reverse("api-feed")).json()["posts"][0]
+
+
+def test_category(client, posts, tags):
+    """Test the category feed only holds posts with the tag"""
+    page = client.get(reverse("api-category", args=["urban"]), {"expand": "tags"}).json()
+    assert len(page["posts"]) == (FEED_PAGE_SIZE + 2) // 2
+    assert all({"slug": "urban", "name": "Urban"} in post["tags"] for post in page["posts"])
+    assert client.get(reverse("api-category", args=["nope"])).status_code == 404
+
+
+def test_post_detail(client, posts, django_assert_num_queries):
+    """Test one post, with sparse fields and tags"""
+    post = posts[0]
+    url = reverse("api-post", args=[post.id]) + "?fields=title,like_count&expand=tags"
+    with django_assert_num_queries(3):  # ETag stamp, post, tags
+        response = client.get(url)
+    assert response.json() == {
+        "id": str(post.id),
+        "title": "Post 0",
+        "like_count": 0,
+        "tags": [{"slug": "nature", "name": "Nature"}],
+    }
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+    missing = reverse("api-post", args=["00000000-0000-0000-0000-000000000000"])
+    assert client.get(missing).status_code == 404
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"fields": "title,password"},
+        {"expand": "comments"},
+        {"cursor": "not-a-cursor"},
+        {"cursor": encode_cursor([1, 2])},
+    ],
+)
+def test_bad_request(client, posts, query):
+    """Test unknown fields, expansions and broken cursors answer 400 with a reason"""
+    response = client.get(reverse("api-feed"), query)
+    assert response.status_code == 400
+    assert response.json()["error"]
@@ -0,0 +1,102 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.base import SessionBase
+from django.test import AsyncRequestFactory
+
+from . import async_views, scraper
+from .models import Post
+from .scrape_cache import get_scrape_cache
+
+PAGE = b"""<html><head>
+<meta property="og:image" content="https://live.staticflickr.com/1/2_3_b.jpg">
+</head><body><h1 class="photo-title">Sunset</h1><a class="owner-name">Jane Doe</a></body></html>"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = 404 if "missing" in self.path else 200
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def flickr():
+    """Fixture to run a local page server in place of Flickr."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    get_scrape_cache().clear()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    get_scrape_cache().clear()
+
+
+def request(method, path, data=None, **headers):
+    factory = AsyncRequestFactory()
+    req = getattr(factory, method)(path, data or {}, headers=headers)
+    req.user = AnonymousUser()
+    req.session = SessionBase()
+    req._messages = FallbackStorage(req)
+    return req
+
+
+@pytest.mark.parametrize("with_httpx", [True, False])
+def test_ascrape_post_data(flickr, monkeypatch, with_httpx):
+    """Test the async fetch, with httpx or on a worker thread without it"""
+    if with_httpx:
+        pytest.importorskip("httpx")
+    else:
+        monkeypatch.setattr(scraper, "httpx", None)
+
+    data = async_to_sync(scraper.ascrape_post_data)(f"{flickr}/photos/1/")
+    assert data == {
+        "image": "https://live.staticflickr.com/1/2_3_b.jpg",
+        "title": "Sunset",
+        "artist": "Jane Doe",
+    }
+    with pytest.raises(scraper.RequestException):
+        async_to_sync(scraper.ascrape_post_data)(f"{flickr}/missing/")
+
+
+def test_async_create(flickr, tag):
+    """Test the async create view scrapes and saves the post with its tags"""
+    data = {"url": f"{flickr}/photos/2/", "body": "Caption", "tags": [tag.id]}
+    response = async_to_sync(async_views.post_create_view)(
+        request("post", "/post/create/", data)
+    )
+
+    assert response.status_code == 302
+    post = Post.objects.get()
+    assert (post.title, post.artist, post.body) == ("Sunset", "Jane Doe", "Caption")
+    assert list(post.tags.all()) == [tag]
+
+
+def test_async_feed_and_post_page(tag):
+    """Test the async feed and post page render the same context as the sync ones"""
+    post = Post.objects.create(title="Lake", image="https://example.com/image.jpg")
+    post.tags.add(tag)
+
+    response = async_to_sync(async_views.home_view)(
+        request("get", "/category/nature", HX_Request="true"), tag="nature"
+    )
+    assert response.status_code == 200
+    assert "Lake" in response.content.decode()
+
+    response = async_to_sync(async_views.post_page_view)(
+        request("get", f"/post/{post.id}"), pk=post.id
+    )
+    assert response.status_code == 200
+    assert "Lake" in response.content.decode()
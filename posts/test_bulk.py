@@ -0,0 +1,158 @@
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from .bulk import bulk_add_tag, bulk_delete_posts, bulk_remove_tag
+from .forms import BulkPostsForm
+from .models import Comment, Like, Post
+
+
+@pytest.fixture
+def staff_client(client, db):
+    """Fixture to log a staff member in."""
+    client.force_login(
+        get_user_model().objects.create_user("mod", "mod@example.com", "pw", is_staff=True)
+    )
+    return client
+
+
+def make_posts(n):
+    return [
+        Post.objects.create(title=f"Post {i}", image="https://example.com/image.jpg", body="")
+        for i in range(n)
+    ]
+
+
+def stats(tag):
+    tag.refresh_from_db()
+    return tag.post_count, tag.latest_post_id
+
+
+def ids(posts):
+    return [post.id for post in posts]
+
+
+def test_add_and_remove_tag(tag):
+    """Test retagging keeps the tag stats and only counts posts that changed"""
+    old, new, other = make_posts(3)
+    old.tags.add(tag)
+    stamp = Post.objects.get(pk=new.pk).updated
+
+    assert bulk_add_tag(ids([old, new]), tag) == 1
+    assert stats(tag) == (2, new.id)
+    assert Post.objects.get(pk=new.pk).updated > stamp  # cached card dropped
+
+    assert bulk_remove_tag(ids([new, other]), tag) == 1
+    assert stats(tag) == (1, old.id)
+    assert list(Post.objects.filter(tags=tag)) == [old]
+
+
+def test_delete(tag, user):
+    """Test deleting posts takes their likes and comments and leaves the tag stats right"""
+    kept, *posts = make_posts(3)
+    for post in (kept, *posts):
+        post.tags.add(tag)
+        Like.objects.create(post=post, user=user)
+        Comment.objects.create(post=post, author=user, body="Nice")
+
+    assert bulk_delete_posts(ids(posts)) == 2
+    assert list(Post.objects.all()) == [kept]
+    assert Like.objects.count() == Comment.objects.count() == 1
+    assert stats(tag) == (1, kept.id)
+
+
+@pytest.mark.parametrize("n", [2, 20])
+def test_queries_independent_of_batch_size(tag, n, django_assert_num_queries):
+    """Test a batch costs the same number of queries however many posts it holds"""
+    posts = ids(make_posts(n))
+    with django_assert_num_queries(8):
+        # savepoint, lock the tag, untagged posts, insert links, cards, touch,
+        # recount, release savepoint
+        bulk_add_tag(posts, tag)
+    with django_assert_num_queries(8):
+        # savepoint, lock the tag, linked posts, delete links, cards, touch,
+        # recount, release savepoint
+        bulk_remove_tag(posts, tag)
+
+
+def test_admin_actions(admin_client, tag):
+    """Test the changelist actions retag and delete the selected posts"""
+    posts = make_posts(2)
+    url = reverse("admin:posts_post_changelist")
+    selected = [str(post.id) for post in posts]
+
+    admin_client.post(url, {"action": "add_tag", "tag": tag.pk, "_selected_action": selected})
+    assert stats(tag) == (2, posts[1].id)
+
+    admin_client.post(url, {"action": "remove_tag", "tag": tag.pk, "_selected_action": selected})
+    assert stats(tag) == (0, None)
+
+    admin_client.post(
+        url, {"action": "delete_selected", "post": "yes", "_selected_action": selected}
+    )
+    assert not Post.objects.exists()
+
+
+def test_admin_action_needs_tag(admin_client, tag):
+    """Test retagging without picking a tag changes nothing"""
+    post = make_posts(1)[0]
+    response = admin_client.post(
+        reverse("admin:posts_post_changelist"),
+        {"action": "add_tag", "_selected_action": [str(post.id)]},
+        follow=True,
+    )
+    assert b"Pick a tag first." in response.content
+    assert not post.tags.exists()
+
+
+def bulk(client, data):
+    return client.post(
+        reverse("post-bulk"),
+        data if isinstance(data, str) else json.dumps(data),
+        content_type="application/json",
+    )
+
+
+def test_endpoint(staff_client, tag):
+    """Test the JSON endpoint runs each action and says how many posts changed"""
+    posts = [str(post.id) for post in make_posts(2)]
+
+    response = bulk(staff_client, {"action": "add_tag", "posts": posts, "tag": "nature"})
+    assert response.json() == {"action": "add_tag", "posts": 2}
+    response = bulk(staff_client, {"action": "remove_tag", "posts": posts[:1], "tag": "nature"})
+    assert response.json() == {"action": "remove_tag", "posts": 1}
+    response = bulk(staff_client, {"action": "delete", "posts": posts})
+    assert response.json() == {"action": "delete", "posts": 2}
+    assert not Post.objects.exists()
+
+
+def test_endpoint_staff_only(client, user):
+    """Test users that aren't staff are turned away"""
+    client.force_login(user)
+    response = bulk(client, {"action": "delete", "posts": []})
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "not json",
+        ["delete"],
+        {"action": "archive", "posts": []},
+        {"action": "add_tag", "posts": ["00000000-0000-0000-0000-000000000000"]},
+    ],
+)
+def test_endpoint_bad_request(staff_client, tag, data):
+    """Test malformed bodies, unknown actions, unknown posts and missing tags"""
+    assert bulk(staff_client, data).status_code == 400
+
+
+def test_too_many_posts_refused_unqueried(db, django_assert_num_queries):
+    """Test a body over MAX_POSTS is turned away before the ids are looked up"""
+    posts = ["00000000-0000-0000-0000-000000000000"] * (BulkPostsForm.MAX_POSTS + 1)
+    form = BulkPostsForm({"action": "delete", "posts": posts})
+    with django_assert_num_queries(0):
+        assert not form.is_valid()
+    assert "At most 1000" in form.errors["posts"][0]
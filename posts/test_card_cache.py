@@ -0,0 +1,69 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import Tag
+from .signals import card_key
+
+
+@pytest.fixture
+def post(post, tag):
+    """Fixture to tag the post, as it stands in the database."""
+    post.tags.add(tag)
+    post.refresh_from_db()
+    return post
+
+
+def test_feed_caches_cards(client, post):
+    """Test a rendered card is stored under its id and version"""
+    client.get(reverse("home"))
+    assert "Test content" in cache.get(card_key(post.id, post.card_version))
+
+
+def test_cached_card_is_served(client, post):
+    """Test the second render comes from the cache"""
+    client.get(reverse("home"))
+    cache.set(card_key(post.id, post.card_version), "<article>cached</article>")
+    assert "<article>cached</article>" in client.get(reverse("home")).content.decode()
+
+
+def test_edit_invalidates_card(client, post, tag):
+    """Test saving through post_edit_view drops the old card"""
+    client.get(reverse("home"))
+    old_key = card_key(post.id, post.card_version)
+
+    client.post(reverse("post-edit", args=[post.id]), {"body": "Edited", "tags": [tag.id]})
+
+    assert cache.get(old_key) is None
+    assert "Edited" in client.get(reverse("home")).content.decode()
+
+
+def test_delete_invalidates_card(client, post):
+    """Test deleting through post_delete_view drops the card"""
+    client.get(reverse("home"))
+    key = card_key(post.id, post.card_version)
+
+    client.post(reverse("post-delete", args=[post.id]))
+
+    assert cache.get(key) is None
+
+
+def test_retag_invalidates_card(client, post):
+    """Test tags added or cleared from either side show up in the card"""
+    client.get(reverse("home"))
+    urban = Tag.objects.create(name="Urban", slug="urban")
+
+    # The sidebar lists every tag too, so look for the card's tag link
+    urban.post_set.add(post)
+    assert ">Urban</a>" in client.get(reverse("home")).content.decode()
+
+    urban.post_set.clear()
+    assert ">Urban</a>" not in client.get(reverse("home")).content.decode()
+
+
+def test_tag_rename_invalidates_card(client, post, tag):
+    """Test renaming a tag re-renders the cards that show it"""
+    client.get(reverse("home"))
+    tag.name = "Wildlife"
+    tag.save()
+    assert ">Wildlife</a>" in client.get(reverse("home")).content.decode()
@@ -0,0 +1,83 @@
+import pytest
+from django.urls import reverse
+
+from .comments import comment_page
+from .models import Comment, Reply
+
+
+def add_comment(post, user, body="Nice", replies=0):
+    comment = Comment.objects.create(post=post, author=user, body=body)
+    for i in range(replies):
+        Reply.objects.create(comment=comment, author=user, body=f"Reply {i}")
+    return comment
+
+
+@pytest.mark.parametrize("threads", [1, 10])
+def test_post_page_query_count(client, post, user, threads, django_assert_num_queries):
+    """Test the comment tree costs the same queries however many threads it has"""
+    for i in range(threads):
+        add_comment(post, user, f"Comment {i}", replies=3)
+
+    # ETag stamp, post, its tags, comments with authors, replies with authors
+    with django_assert_num_queries(5):
+        response = client.get(reverse("post", args=[post.id]))
+    assert len(response.context["comments"]) == threads
+    assert "Reply 2" in response.content.decode()
+
+
+def test_comment_cursor(post, user):
+    """Test the newest first tab pages through every comment once"""
+    old = add_comment(post, user, "Old")
+    new = add_comment(post, user, "New")
+    newer = add_comment(post, user, "Newer")
+
+    first, cursor = comment_page(post, page_size=2)
+    rest, end = comment_page(post, "newest", cursor, page_size=2)
+    assert first + rest == [newer, new, old]
+    assert end is None
+
+
+def test_unknown_tab(client, post, user):
+    """Test a sort without a tab, such as the old ?sort=top, shows newest first"""
+    add_comment(post, user)
+    response = client.get(reverse("post", args=[post.id]), {"sort": "top"})
+    assert response.context["sort"] == "newest"
+
+
+def test_counts(post, user):
+    """Test comment and reply counts follow creates and deletes"""
+    comment = add_comment(post, user, replies=2)
+    add_comment(post, user)
+    post.refresh_from_db()
+    comment.refresh_from_db()
+    assert (post.comment_count, comment.reply_count) == (4, 2)
+
+    comment.replies.first().delete()
+    comment.refresh_from_db()
+    assert comment.reply_count == 1
+
+    comment.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+def test_create_comment_and_reply(client, post, user):
+    """Test signed in users can comment and reply"""
+    client.force_login(user)
+    response = client.post(reverse("comment-create", args=[post.id]), {"body": "Cool"})
+    assert response.status_code == 302
+    comment = Comment.objects.get()
+    assert (comment.author, comment.body) == (user, "Cool")
+
+    client.post(reverse("reply-create", args=[comment.id]), {"body": "Agreed"})
+    assert comment.replies.get().body == "Agreed"
+
+    client.post(reverse("comment-create", args=[post.id]), {"body": ""})
+    assert Comment.objects.count() == 1
+
+
+def test_comment_needs_login(client, post):
+    """Test anonymous comments go to the login page"""
+    response = client.post(reverse("comment-create", args=[post.id]), {"body": "Hi"})
+    assert response.status_code == 302
+    assert not Comment.objects.exists()
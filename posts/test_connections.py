@@ -0,0 +1,83 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections
+from django.urls import reverse
+
+from core.db import configure_connections
+
+from .perf import connection_stats
+
+POSTGRES = {"ENGINE": "django.db.backends.postgresql", "NAME": "dj_awesome"}
+LIMITS = {"pool_min_size": 1, "pool_max_size": 4, "pool_timeout": 5, "max_age": 600}
+
+
+def test_off():
+    """Test every request gets a new connection"""
+    database = configure_connections(POSTGRES, "off", **LIMITS)
+    assert database["CONN_MAX_AGE"] == 0
+    assert not database["CONN_HEALTH_CHECKS"]
+    assert "OPTIONS" not in database
+
+
+def test_persistent():
+    """Test connections are kept for max_age and checked before reuse"""
+    database = configure_connections(POSTGRES, "persistent", **LIMITS)
+    assert database["CONN_MAX_AGE"] == 600
+    assert database["CONN_HEALTH_CHECKS"]
+
+
+def test_pool():
+    """Test the pool limits land where Django's PostgreSQL backend reads them"""
+    pytest.importorskip("psycopg_pool")
+    database = configure_connections(
+        {**POSTGRES, "OPTIONS": {"sslmode": "disable"}}, "pool", **LIMITS
+    )
+    # Django refuses pools with persistent connections
+    assert database["CONN_MAX_AGE"] == 0
+    assert database["OPTIONS"] == {
+        "sslmode": "disable",
+        "pool": {"min_size": 1, "max_size": 4, "timeout": 5},
+    }
+
+
+@pytest.mark.parametrize(
+    "database, mode",
+    [
+        (POSTGRES, "pooled"),
+        ({"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"}, "pool"),
+    ],
+)
+def test_misconfigured(database, mode):
+    """Test unknown modes and pools on SQLite fail at startup"""
+    with pytest.raises(ImproperlyConfigured):
+        configure_connections(database, mode, **LIMITS)
+
+
+@pytest.mark.django_db
+def test_pool_stats():
+    """Test a pooled connection goes back to the pool and shows in the stats"""
+    if connection.vendor != "postgresql":
+        pytest.skip("Connection pooling needs PostgreSQL")
+    pytest.importorskip("psycopg_pool")
+
+    settings_dict = {
+        **connection.settings_dict,
+        **configure_connections(connection.settings_dict, "pool", **LIMITS),
+    }
+    pooled = type(connections["default"])(settings_dict, alias="pool_test")
+    try:
+        with pooled.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        pooled.close()  # returns the connection to the pool
+        stats = pooled.pool.get_stats()
+        assert stats["pool_max"] == 4
+        assert stats["pool_available"] >= 1
+    finally:
+        pooled.close_pool()
+
+
+def test_stats_page_lists_databases(admin_client):
+    """Test staff see how each database connects"""
+    response = admin_client.get(reverse("perf-stats"))
+    assert response.context["databases"][0]["alias"] == "default"
+    assert connection_stats()[0]["vendor"] == connection.vendor
@@ -0,0 +1,144 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.urls import reverse
+
+from . import async_views
+from .models import Comment, Post
+from .sidebar import GENERATION_KEY
+from .test_async_views import request
+
+
+@pytest.fixture
+def post(post, tag):
+    """Fixture to tag the post."""
+    post.tags.add(tag)
+    return post
+
+
+def revalidate(client, url, response, **headers):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **headers)
+
+
+def test_feed_not_modified(client, post, django_assert_num_queries):
+    """Test an unchanged feed answers 304 without rendering"""
+    response = client.get(reverse("home"))
+    assert response.status_code == 200
+
+    with django_assert_num_queries(1):  # the ETag stamps
+        response = revalidate(client, reverse("home"), response)
+    assert response.status_code == 304
+    assert response.templates == []
+
+
+def test_feed_changes(client, post, tag, django_capture_on_commit_callbacks):
+    """Test new, edited and deleted posts and renamed tags all change the ETag"""
+    etags = {client.get(reverse("home"))["ETag"]}
+
+    def changed():
+        response = client.get(reverse("home"))
+        assert response["ETag"] not in etags
+        etags.add(response["ETag"])
+
+    Post.objects.create(title="New", image="https://example.com/new.jpg")
+    changed()
+    post.body = "Edited"
+    post.save()
+    changed()
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.name = "Outdoors"
+        tag.save()
+    changed()
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.get(title="New").delete()
+    changed()
+
+
+def test_no_last_modified(client, post):
+    """Test a date alone can't revalidate, it doesn't move with deletes or the viewer"""
+    response = client.get(reverse("home"))
+    assert "Last-Modified" not in response
+    future = "Fri, 01 Jan 2100 00:00:00 GMT"
+    assert client.get(reverse("home"), HTTP_IF_MODIFIED_SINCE=future).status_code == 200
+
+
+def test_delete_in_another_process(client, post):
+    """Test a delete bumping the shared generation elsewhere changes the ETag here"""
+    etag = client.get(reverse("home"))["ETag"]
+    caches["shared"].incr(GENERATION_KEY)  # what the deleting process's signal does
+    assert revalidate(client, reverse("home"), {"ETag": etag}).status_code == 200
+
+
+def test_validator_covers_request(client, post):
+    """Test pages, htmx fragments and queries don't share an ETag"""
+    urls = [reverse("home"), reverse("home") + "?q=test", reverse("category", args=["nature"])]
+    etags = {client.get(url)["ETag"] for url in urls}
+    etags.add(client.get(reverse("home"), HTTP_HX_REQUEST="true")["ETag"])
+    assert len(etags) == 4
+
+
+def test_anonymous_proxy_cacheable(client, post, settings):
+    """Test anonymous pages may be kept by a shared cache, varying on cookies and htmx"""
+    settings.POSTS_PROXY_CACHE_SECONDS = 30
+    for url in (reverse("home"), reverse("post", args=[post.id])):
+        response = client.get(url)
+        cache_control = set(response["Cache-Control"].split(", "))
+        assert cache_control == {"public", "max-age=0", "s-maxage=30"}
+        assert {"Cookie", "HX-Request"} <= set(response["Vary"].split(", "))
+        assert not response.cookies
+
+
+def test_logged_in_private(client, post):
+    """Test pages with a user's name on them stay out of shared caches"""
+    anonymous = client.get(reverse("home"))["ETag"]
+    client.force_login(get_user_model().objects.create_user("lisa", "lisa@example.com", "pw"))
+
+    response = client.get(reverse("home"))
+    assert response["ETag"] != anonymous
+    assert set(response["Cache-Control"].split(", ")) == {"private", "no-cache"}
+    assert revalidate(client, reverse("home"), response).status_code == 304
+
+
+def test_pending_message_not_cached(client, post):
+    """Test a page showing a flash message gets no validator"""
+    client.force_login(get_user_model().objects.create_user("lisa", "lisa@example.com", "pw"))
+    client.post(reverse("comment-create", args=[post.id]), {"body": ""})  # flashes an error
+
+    response = client.get(reverse("home"))
+    assert "ETag" not in response
+    assert "private" in response["Cache-Control"]
+
+
+def test_post_page(client, post, django_assert_num_queries):
+    """Test the post page revalidates until a comment changes it"""
+    url = reverse("post", args=[post.id])
+    response = client.get(url)
+    with django_assert_num_queries(1):
+        assert revalidate(client, url, response).status_code == 304
+
+    user = get_user_model().objects.create_user("lisa", "lisa@example.com", "pw")
+    Comment.objects.create(post=post, author=user, body="Nice")
+    assert revalidate(client, url, response).status_code == 200
+
+
+def test_missing_post(client, db):
+    """Test a missing post still answers 404"""
+    response = client.get(reverse("post", args=["00000000-0000-0000-0000-000000000000"]))
+    assert response.status_code == 404
+    assert "ETag" not in response
+
+
+def test_async_views_not_modified(post):
+    """Test the async feed and post page answer 304 the same way"""
+    response = async_to_sync(async_views.home_view)(request("get", "/"))
+    etag = response["ETag"]
+    response = async_to_sync(async_views.home_view)(request("get", "/", If_None_Match=etag))
+    assert response.status_code == 304
+
+    path = f"/post/{post.id}"
+    response = async_to_sync(async_views.post_page_view)(request("get", path), pk=post.id)
+    response = async_to_sync(async_views.post_page_view)(
+        request("get", path, If_None_Match=response["ETag"]), pk=post.id
+    )
+    assert response.status_code == 304
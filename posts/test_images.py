@@ -0,0 +1,160 @@
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.urls import reverse
+
+from . import images, scrape_client
+from .images import ImageCache
+from .models import Post
+from .scrape_client import ScrapeClient
+
+Image = pytest.importorskip("PIL.Image")
+
+SOURCE = "https://live.staticflickr.com/1/2_3_b.jpg"
+
+
+def jpeg(width=1600, height=1200):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "orange").save(out, "JPEG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Fixture to serve a fake Flickr image and count the fetches."""
+    urls = []
+
+    def fetch(self, url):
+        urls.append(url)
+        return jpeg()
+
+    monkeypatch.setattr(ImageCache, "_fetch", fetch)
+    return urls
+
+
+@pytest.fixture
+def image_cache(tmp_path, monkeypatch):
+    """Fixture to keep cached images in a temporary directory."""
+    cache = ImageCache(tmp_path, max_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(images, "_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def post(db):
+    """Fixture to create a post."""
+    return Post.objects.create(title="Test Post", image=SOURCE, body="Test content")
+
+
+def test_variants_are_resized_once(client, post, image_cache, fetches):
+    """Test the original is fetched once and each variant is resized from it"""
+    feed = client.get(reverse("post-image", args=[post.id, "feed"]))
+    thumb = client.get(reverse("post-image", args=[post.id, "thumb"]))
+    client.get(reverse("post-image", args=[post.id, "feed"]))
+
+    assert fetches == [SOURCE]
+    assert Image.open(io.BytesIO(b"".join(feed.streaming_content))).size == (800, 600)
+    assert Image.open(io.BytesIO(b"".join(thumb.streaming_content))).size == (80, 80)
+    assert feed["Content-Type"] == "image/jpeg"
+    assert "max-age=31536000" in feed["Cache-Control"]
+
+
+def test_etag_revalidation(client, post, image_cache, fetches):
+    """Test a matching If-None-Match gets a 304 without touching the cache"""
+    url = reverse("post-image", args=[post.id, "feed"])
+    etag = client.get(url)["ETag"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+
+def test_unknown_variant_and_pending_post(client, post, image_cache, fetches):
+    """Test only known variants of posts with an image are served"""
+    assert client.get(reverse("post-image", args=[post.id, "huge"])).status_code == 404
+    pending = Post.objects.create(title="Pending", image="", status=Post.PENDING)
+    assert client.get(reverse("post-image", args=[pending.id, "feed"])).status_code == 404
+    assert fetches == []
+
+
+def test_eviction(tmp_path, fetches):
+    """Test the least recently used files go once the cache is over its size"""
+    cache = ImageCache(tmp_path, max_bytes=len(jpeg()) * 3)
+    old, _ = cache.get("a", SOURCE, "original")
+    os.utime(old, (1, 1))
+    cache.get("b", SOURCE, "original")
+    cache.get("c", SOURCE, "original")
+    new, _ = cache.get("d", SOURCE, "original")
+
+    assert not old.exists()
+    assert new.exists()
+    assert cache.disk_usage() <= cache.max_bytes
+
+
+def test_one_lock_at_a_time(tmp_path, monkeypatch):
+    """Test a variant miss holds no lock of its own while the original is fetched"""
+    cache = ImageCache(tmp_path, max_bytes=10 * 1024 * 1024)
+    held = []
+
+    def fetch(self, url):
+        held.append(sum(lock.locked() for lock in cache._key_locks))
+        return jpeg()
+
+    monkeypatch.setattr(ImageCache, "_fetch", fetch)
+    for post_id in range(10):  # some land on other stripes than their original
+        cache.get(post_id, SOURCE, "feed")
+    assert held == [1] * 10
+
+
+@pytest.mark.parametrize("body", [b"<html>Rate limited</html>", jpeg()[:2000]])
+def test_unreadable_image(client, post, image_cache, monkeypatch, body):
+    """Test an HTML page or truncated download sends the browser to Flickr and isn't kept"""
+    fetched = []
+
+    def fetch(self, url):
+        fetched.append(url)
+        return body
+
+    monkeypatch.setattr(ImageCache, "_fetch", fetch)
+    url = reverse("post-image", args=[post.id, "feed"])
+    for _ in range(2):
+        response = client.get(url)
+        assert response.status_code == 302
+        assert response.url == SOURCE
+    assert fetched == [SOURCE, SOURCE]
+    assert not image_cache.path(post.id, "original").exists()
+
+
+class FlickrHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = jpeg()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.send_header("Last-Modified", "Wed, 01 Jan 2025 00:00:00 GMT")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_image_bodies_not_kept_in_memory(tmp_path, monkeypatch):
+    """Test an image miss leaves nothing in the scrape client's validator cache"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlickrHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ScrapeClient()
+    monkeypatch.setattr(scrape_client, "_client", client)
+    try:
+        path, _ = ImageCache(tmp_path, max_bytes=10 * 1024 * 1024).get(
+            1, f"http://127.0.0.1:{server.server_address[1]}/1.jpg", "original"
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert path.read_bytes()[:2] == b"\xff\xd8"
+    assert not client._validators
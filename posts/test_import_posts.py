@@ -0,0 +1,101 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from requests.exceptions import ConnectionError
+
+from .management.commands import import_posts
+from .models import Post, Tag
+
+
+def fake_scrape(url):
+    if "broken" in url:
+        raise ConnectionError("connection refused")
+    return {
+        "image": "https://live.staticflickr.com/1/2_3_b.jpg",
+        "title": url.rsplit("/", 1)[-1],
+        "artist": "Jane Doe",
+    }
+
+
+@pytest.fixture
+def scrape(monkeypatch):
+    """Fixture to keep the importer off the network."""
+    monkeypatch.setattr(import_posts, "scrape_post_data", fake_scrape)
+
+
+def run(*args):
+    out = io.StringIO()
+    call_command("import_posts", *args, stdout=out, stderr=io.StringIO())
+    return out.getvalue()
+
+
+def test_import_posts(tmp_path, tags, scrape):
+    """Test posts, tags and captions are imported and duplicates skipped"""
+    Post.objects.create(url="https://flickr.com/p/old", image="https://example.com/x.jpg")
+    source = tmp_path / "urls.tsv"
+    source.write_text(
+        "flickr.com/p/one\tnature,urban\tFirst caption\n"
+        "http://flickr.com/p/one\n"
+        "https://flickr.com/p/two\turban\n"
+        "\n"
+        "# already posted\n"
+        "https://flickr.com/p/old\n"
+        "https://flickr.com/p/broken\n"
+    )
+
+    output = run(str(source), "--batch-size", "2")
+
+    assert "Created 2, skipped 2, failed 1" in output
+    one = Post.objects.get(url="https://flickr.com/p/one")
+    assert one.title == "one"
+    assert one.body == "First caption"
+    assert set(one.tags.values_list("slug", flat=True)) == {"nature", "urban"}
+    two = Post.objects.get(url="https://flickr.com/p/two")
+    assert list(two.tags.all()) == [tags[1]]
+    assert [(t.post_count, t.latest_post) for t in Tag.objects.order_by("slug")] == [
+        (1, one),
+        (2, two),
+    ]
+
+
+def test_import_posts_posted_meanwhile(tmp_path, tags, scrape, monkeypatch):
+    """Test a URL posted from the site during the fetch is skipped, not fatal"""
+    bulk_create = Post.objects.bulk_create
+
+    def post_first(posts, **kwargs):
+        Post.objects.create(url="https://flickr.com/p/one", image="https://example.com/x.jpg")
+        return bulk_create(posts, **kwargs)
+
+    monkeypatch.setattr(Post.objects, "bulk_create", post_first)
+    source = tmp_path / "urls.tsv"
+    source.write_text("flickr.com/p/one\tnature\nflickr.com/p/two\tnature\n")
+
+    output = run(str(source))
+
+    assert "Created 1, skipped 1, failed 0" in output
+    assert not Post.objects.get(url="https://flickr.com/p/one").tags.exists()
+    two = Post.objects.get(url="https://flickr.com/p/two")
+    assert [(t.post_count, t.latest_post) for t in Tag.objects.filter(slug="nature")] == [
+        (1, two)
+    ]
+
+
+def test_import_posts_stdin(tags, scrape, monkeypatch):
+    """Test URLs can be piped in"""
+    monkeypatch.setattr("sys.stdin", io.StringIO("https://flickr.com/p/one\n"))
+    assert "Created 1" in run("-")
+
+
+def test_import_posts_resumes(tmp_path, tags, scrape):
+    """Test a checkpoint makes a rerun skip the lines already done"""
+    source = tmp_path / "urls.txt"
+    source.write_text("".join(f"https://flickr.com/p/{i}\n" for i in range(5)))
+    checkpoint = tmp_path / "checkpoint"
+    checkpoint.write_text("3")
+
+    output = run(str(source), "--checkpoint", str(checkpoint), "--batch-size", "1")
+
+    assert "Resuming after line 3" in output
+    assert set(Post.objects.values_list("title", flat=True)) == {"3", "4"}
+    assert checkpoint.read_text() == "5"
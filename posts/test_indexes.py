@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+
+from .models import Post, Tag
+from .pagination import FEED_ORDERING, FEED_PAGE_SIZE, _page_queryset, paginate
+
+
+@pytest.fixture
+def analyzed_feed(db):
+    """Fixture to fill the tables until the planner prefers indexes, returns the tags."""
+    tags = [Tag.objects.create(name=f"Tag {i}", slug=f"tag-{i}") for i in range(5)]
+    posts = Post.objects.bulk_create(
+        Post(title=f"Post {i}", image="https://example.com/image.jpg", body="")
+        for i in range(2000)
+    )
+    Post.tags.through.objects.bulk_create(
+        Post.tags.through(post_id=post.id, tag_id=tags[i % 5].id)
+        for i, post in enumerate(posts)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return tags
+
+
+def feed_plan():
+    return Post.objects.order_by(*FEED_ORDERING)[:11].explain()
+
+
+def cursor_plan():
+    # Halfway down, where a scan from the top would read 1000 rows first
+    _, cursor = paginate(Post.objects.all(), page_size=1000)
+    return _page_queryset(Post.objects.all(), cursor, FEED_PAGE_SIZE, FEED_ORDERING).explain()
+
+
+def category_plan(tag):
+    return Post.objects.filter(tags=tag).order_by(*FEED_ORDERING)[:11].explain()
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Postgres plans")
+def test_postgres_plans_use_indexes(analyzed_feed):
+    """Test the feed and a category page are index scans without a sort"""
+    for plan in (feed_plan(), category_plan(analyzed_feed[0])):
+        assert "posts_post_feed_idx" in plan
+        assert "Seq Scan" not in plan
+        assert "Sort" not in plan
+
+    # The cursor bounds the index range, rather than being a filter only
+    assert "Index Cond: (created <=" in cursor_plan()
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite plans")
+def test_sqlite_plans_use_indexes(analyzed_feed):
+    """Test the feed walks its index and a category page never scans a table"""
+    plan = feed_plan()
+    assert "USING INDEX posts_post_feed_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+    # The cursor bounds the index range, rather than being a filter only
+    assert "USING INDEX posts_post_feed_idx (created<?)" in cursor_plan()
+
+    # SQLite starts from the tag's rows in the through table, then sorts
+    # just those, which is still no full scan of either table
+    plan = category_plan(analyzed_feed[0])
+    assert "COVERING INDEX posts_post_tags_tag_post_idx" in plan
+    for line in plan.splitlines():
+        assert " SCAN " not in line or "USING INDEX" in line
@@ -0,0 +1,176 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from requests.exceptions import ConnectionError
+
+from . import jobs, scraper
+from .models import Post, ScrapeJob
+from .scraper import ScrapeError
+
+SCRAPED = {
+    "image": "https://live.staticflickr.com/1/2_3_b.jpg",
+    "title": "Sunset",
+    "artist": "Jane Doe",
+}
+
+
+@pytest.fixture
+def pending_post(db):
+    """Fixture to create a post waiting for the worker."""
+    post = Post(url="https://www.flickr.com/photos/sample", body="Caption")
+    jobs.enqueue_scrape(post)
+    return post
+
+
+def test_async_create_skips_scraping(client, tag, settings, monkeypatch):
+    """Test background mode saves a pending post without touching the network"""
+    settings.POSTS_ASYNC_INGEST = True
+    monkeypatch.setattr(
+        "posts.scraper.scrape_post_data", lambda url: pytest.fail("scraped inline")
+    )
+
+    form_data = {
+        "url": "https://www.flickr.com/photos/sample",
+        "body": "New Caption",
+        "tags": [tag.id],
+    }
+    response = client.post(reverse("post-create"), data=form_data)
+
+    assert response.status_code == 302
+    post = Post.objects.get()
+    assert post.status == Post.PENDING
+    assert post.url == "https://www.flickr.com/photos/sample"
+    assert tag in post.tags.all()
+    assert post.scrape_job.status == ScrapeJob.QUEUED
+
+
+def test_worker_fills_in_post(pending_post, monkeypatch):
+    """Test a successful job copies the scraped data onto the post"""
+    monkeypatch.setattr(scraper, "scrape_post_data", lambda url: SCRAPED)
+
+    assert jobs.run_pending_jobs() == 1
+
+    pending_post.refresh_from_db()
+    assert pending_post.status == Post.READY
+    assert pending_post.image == SCRAPED["image"]
+    assert pending_post.title == "Sunset"
+    assert pending_post.artist == "Jane Doe"
+    assert pending_post.scrape_job.status == ScrapeJob.DONE
+
+
+def test_worker_retries_with_backoff(pending_post, monkeypatch, settings):
+    """Test network errors put the job back with a growing delay"""
+    settings.SCRAPE_RETRY_DELAY = 10
+
+    def fail(url):
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(scraper, "scrape_post_data", fail)
+
+    before = timezone.now()
+    jobs.run_pending_jobs()
+    job = ScrapeJob.objects.get()
+    assert job.status == ScrapeJob.QUEUED
+    assert job.attempts == 1
+    assert job.run_after >= before + jobs.backoff(1)
+    assert "connection refused" in job.last_error
+
+    # Not due yet, so the next poll leaves it alone
+    assert jobs.run_pending_jobs() == 0
+    assert jobs.backoff(3) == 4 * jobs.backoff(1)
+
+
+def test_worker_gives_up(pending_post, monkeypatch, settings):
+    """Test the post is marked failed once attempts run out"""
+    settings.SCRAPE_MAX_ATTEMPTS = 2
+
+    def fail(url):
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(scraper, "scrape_post_data", fail)
+
+    for _ in range(2):
+        ScrapeJob.objects.update(run_after=timezone.now())
+        jobs.run_pending_jobs()
+
+    pending_post.refresh_from_db()
+    assert pending_post.status == Post.FAILED
+    assert ScrapeJob.objects.get().status == ScrapeJob.FAILED
+
+
+def test_post_deleted_during_scrape(pending_post, monkeypatch):
+    """Test a post deleted while its page is fetched stays deleted, job and all"""
+
+    def scrape(url):
+        Post.objects.filter(pk=pending_post.pk).delete()
+        return SCRAPED
+
+    monkeypatch.setattr(scraper, "scrape_post_data", scrape)
+
+    assert jobs.run_pending_jobs() == 1
+    assert not Post.objects.exists()
+    assert not ScrapeJob.objects.exists()
+
+
+def test_caption_edited_during_scrape(pending_post, monkeypatch):
+    """Test the worker writes the scraped fields only, keeping a new caption"""
+
+    def scrape(url):
+        Post.objects.filter(pk=pending_post.pk).update(body="Edited")
+        return SCRAPED
+
+    monkeypatch.setattr(scraper, "scrape_post_data", scrape)
+
+    jobs.run_pending_jobs()
+    pending_post.refresh_from_db()
+    assert (pending_post.body, pending_post.status) == ("Edited", Post.READY)
+
+
+def test_worker_survives_unexpected_errors(pending_post, monkeypatch):
+    """Test a bug in one job is recorded and retried, and the batch goes on"""
+    other = Post(url="https://www.flickr.com/photos/other", body="")
+    jobs.enqueue_scrape(other)
+
+    def scrape(url):
+        if url == pending_post.url:
+            raise KeyError("image")
+        return SCRAPED
+
+    monkeypatch.setattr(scraper, "scrape_post_data", scrape)
+
+    assert jobs.run_pending_jobs() == 2
+    job = pending_post.scrape_job
+    job.refresh_from_db()
+    assert job.status == ScrapeJob.QUEUED
+    assert job.attempts == 1
+    assert job.last_error == "'image'"
+    other.refresh_from_db()
+    assert other.status == Post.READY
+
+
+def test_worker_does_not_retry_pages_without_image(pending_post, monkeypatch):
+    """Test a page without a Flickr image fails right away"""
+
+    def fail(url):
+        raise ScrapeError("No valid image found on the page.")
+
+    monkeypatch.setattr(scraper, "scrape_post_data", fail)
+
+    jobs.run_pending_jobs()
+    job = ScrapeJob.objects.get()
+    assert job.status == ScrapeJob.FAILED
+    assert job.attempts == 1
+
+
+def test_stale_lease_is_reclaimed(pending_post):
+    """Test jobs left running by a dead worker are handed out again"""
+    ScrapeJob.objects.update(status=ScrapeJob.RUNNING, run_after=timezone.now())
+    assert len(jobs.claim_jobs()) == 1
+    assert jobs.claim_jobs() == []
+
+
+def test_post_status_view(client, pending_post):
+    """Test the status endpoint the pending card polls"""
+    response = client.get(reverse("post-status", args=[pending_post.id]))
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
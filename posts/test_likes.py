@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.urls import reverse
+
+from .models import Like, Post
+from .ranking import HOT_HALF_LIFE, hot_score
+
+
+def test_hot_score_decays():
+    """Test doubling likes + 1 makes up for one half-life of age"""
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    older = now - timedelta(seconds=HOT_HALF_LIFE)
+    assert hot_score(7, older) == pytest.approx(hot_score(3, now))
+    assert hot_score(1, now) > hot_score(0, now)
+
+
+def test_like_toggles(client, user, post):
+    """Test liking twice takes the like back, moving the count and score"""
+    client.force_login(user)
+    initial_score = post.hot_score
+
+    response = client.post(reverse("post-like", args=[post.id]), HTTP_HX_REQUEST="true")
+    assert response.status_code == 200
+    assert "posts/post.html" in [t.name for t in response.templates]
+    post.refresh_from_db()
+    assert post.like_count == 1
+    assert Like.objects.filter(user=user, post=post).exists()
+    assert post.hot_score == pytest.approx(hot_score(1, post.created))
+
+    client.post(reverse("post-like", args=[post.id]))
+    post.refresh_from_db()
+    assert post.like_count == 0
+    assert post.hot_score == pytest.approx(initial_score, abs=1e-3)
+
+
+def test_like_needs_login(client, post):
+    """Test anonymous likes go to the login page"""
+    response = client.post(reverse("post-like", args=[post.id]))
+    assert response.status_code == 302
+    assert Like.objects.count() == 0
+
+
+def test_top_posts(client, user, post):
+    """Test the sidebar lists posts by hot score"""
+    other = Post.objects.create(title="Other", image="https://example.com/other.jpg")
+    client.force_login(user)
+    client.post(reverse("post-like", args=[post.id]))
+
+    top = list(client.get(reverse("home")).context["top_posts"])
+    assert top == [post, other]
@@ -0,0 +1,190 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from django.urls import reverse
+
+from . import perf
+from .models import Post
+from .perf import PerfMiddleware, PerfStats, RequestTimings, get_stats, timed
+from .scrape_cache import get_scrape_cache
+
+
+@pytest.fixture(autouse=True)
+def stats(settings):
+    """Fixture to measure every request and start with no samples."""
+    settings.POSTS_PERF = {"SAMPLE_RATE": 1.0}
+    get_stats().clear()
+    yield get_stats()
+    get_stats().clear()
+
+
+@pytest.fixture
+def staff(db):
+    """Fixture to create a staff member, the only one shown Server-Timing."""
+    return get_user_model().objects.create_user(
+        "mod", "mod@example.com", "password", is_staff=True
+    )
+
+
+@pytest.fixture
+def staff_client(client, staff):
+    """Fixture to log the staff member in."""
+    client.force_login(staff)
+    return client
+
+
+def staff_request():
+    request = RequestFactory().get("/")
+    request.user = SimpleNamespace(is_staff=True)
+
+    async def auser():
+        return request.user
+
+    request.auser = auser
+    return request
+
+
+def metrics(response):
+    return {m.split(";")[0]: m for m in response["Server-Timing"].split(", ")}
+
+
+def cache_counts(metric):
+    """(hits, misses) out of 'cache-x;desc="3 hit 1 miss"'"""
+    hits, _, misses, _ = metric.split('desc="')[1].split()
+    return int(hits), int(misses)
+
+
+def test_server_timing(staff_client, post, stats):
+    """Test a sampled page reports its queries, rendering and cache use"""
+    response = staff_client.get(reverse("home"))
+    timing = metrics(response)
+
+    assert set(timing) >= {"total", "db", "template", "cache-default"}
+    assert "queries" in timing["db"]
+    # Nothing cached yet, so at least the post card misses
+    assert cache_counts(timing["cache-default"])[1] >= 1
+
+    [row] = stats.summary()
+    assert row["view"] == "home"
+    assert row["count"] == 1
+    assert row["queries"][0] > 0
+
+
+def test_card_cache_hits_counted(staff_client, post):
+    """Test the second render finds the post card in the cache"""
+    staff_client.get(reverse("home"))
+    timing = metrics(staff_client.get(reverse("home")))
+    assert cache_counts(timing["cache-default"])[0] >= 1
+
+
+def test_unsampled(staff_client, post, settings, stats):
+    """Test requests outside the sample are left alone"""
+    settings.POSTS_PERF = {"SAMPLE_RATE": 0}
+    response = staff_client.get(reverse("home"))
+    assert "Server-Timing" not in response
+    assert stats.summary() == []
+
+
+def test_visitors_get_no_server_timing(client, user, post, stats):
+    """Test pages a proxy may cache, or users may read, carry no timings"""
+    response = client.get(reverse("home"))
+    assert "public" in response["Cache-Control"]
+    assert "Server-Timing" not in response
+
+    client.force_login(user)
+    assert "Server-Timing" not in client.get(reverse("home"))
+    assert len(stats.summary()) == 1  # both still measured
+
+
+def test_scrape_cache_counted():
+    """Test scrape cache lookups made during the request are reported"""
+
+    def view(request):
+        get_scrape_cache().get("https://www.flickr.com/photos/a/1/")
+        return HttpResponse()
+
+    response = PerfMiddleware(view)(staff_request())
+    assert cache_counts(metrics(response)["cache-scrape"]) == (0, 1)
+
+
+def test_async_requests_measured():
+    """Test the middleware stays async in front of async views"""
+
+    async def view(request):
+        with timed("scrape"):
+            await asyncio.sleep(0.01)
+        return HttpResponse()
+
+    response = asyncio.run(PerfMiddleware(view)(staff_request()))
+    assert float(metrics(response)["scrape"].split("dur=")[1]) >= 10
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_queries_counted(staff):
+    """Test queries made from the ASGI handler's worker thread are counted"""
+    Post.objects.create(title="Test Post", image="https://example.com/image.jpg", body="")
+    client = AsyncClient()
+    client.force_login(staff)
+
+    async def get():
+        try:
+            return await client.get(reverse("home"))
+        finally:
+            # The worker thread's connection would outlive the test database
+            await sync_to_async(connections.close_all)()
+
+    response = asyncio.run(get())
+    # Session, user, ETag stamps, posts page, tags for the page, sidebar
+    # categories, top posts
+    assert metrics(response)["db"].endswith('desc="7 queries"')
+
+
+def test_nested_timers_counted_once():
+    """Test a timer inside the same timer doesn't add its time twice"""
+    timings = RequestTimings()
+    token = perf._current.set(timings)
+    try:
+        with timed("template"):
+            with timed("template"):
+                pass
+    finally:
+        perf._current.reset(token)
+    assert list(timings.durations) == ["template"]
+    assert not timings._running
+
+
+def test_percentiles():
+    """Test nearest rank percentiles over the window"""
+    stats = PerfStats(window=100)
+    for ms in range(1, 201):  # only the latest 100 stay
+        timings = RequestTimings()
+        timings.total = ms / 1000
+        timings.queries = 2
+        timings.cache["default"] = [1, 1]
+        stats.add("home", timings)
+
+    [row] = stats.summary()
+    assert row["count"] == 100
+    assert row["total"] == [150.0, 190.0, 199.0]
+    assert row["queries"] == [2, 2, 2]
+    assert row["cache"] == {"default": 0.5}
+
+
+def test_stats_page_staff_only(client, db, stats):
+    """Test only staff see the percentiles"""
+    user = get_user_model().objects.create_user("lisa", "lisa@example.com", "password")
+    client.force_login(user)
+    assert client.get(reverse("perf-stats")).status_code == 302
+
+    user.is_staff = True
+    user.save()
+    client.get(reverse("home"))
+    response = client.get(reverse("perf-stats"))
+    assert response.status_code == 200
+    assert "home" in [row["view"] for row in response.context["rows"]]
@@ -0,0 +1,106 @@
+import importlib
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.urls import reverse
+
+from . import async_views, scraper
+from .models import Post
+from .post_urls import url_key
+from .test_async_views import request
+
+fill_url_keys = importlib.import_module("posts.migrations.0016_post_url_key").fill_url_keys
+
+
+def make_post(url, title="Lake"):
+    return Post.objects.create(url=url, title=title, image="https://example.com/image.jpg")
+
+
+def no_scraping(url):
+    raise AssertionError(f"fetched {url}")
+
+
+@pytest.fixture
+def shared(db):
+    """Fixture to create a post from a Flickr URL."""
+    return make_post("https://flickr.com/photos/1/")
+
+
+def test_url_key():
+    """Test the key follows PostCreateForm's normalization, whatever the scheme"""
+    key = url_key("https://flickr.com/photos/1/")
+    assert url_key(" flickr.com/photos/1/ ") == url_key("http://flickr.com/photos/1/") == key
+    assert url_key("https://flickr.com/photos/2/") != key
+    assert url_key("") is None
+
+
+def test_unique(shared):
+    """Test the database refuses a second post of the same URL"""
+    with pytest.raises(IntegrityError):
+        make_post("flickr.com/photos/1/")
+
+
+def test_create_duplicate(client, shared, tag, monkeypatch, django_assert_num_queries):
+    """Test a repost goes to the existing post without fetching the page"""
+    monkeypatch.setattr(scraper, "scrape_post_data", no_scraping)
+    data = {"url": "flickr.com/photos/1/", "body": "Again", "tags": [tag.id]}
+    with django_assert_num_queries(2):  # the tags, the url_key lookup
+        response = client.post(reverse("post-create"), data)
+    assert response.status_code == 302
+    assert response.url == reverse("post", args=[shared.id])
+    assert Post.objects.count() == 1
+
+
+def test_async_create_duplicate(shared, tag, monkeypatch):
+    """Test the async create view checks before fetching too"""
+    monkeypatch.setattr(scraper, "ascrape_post_data", no_scraping)
+    data = {"url": "https://flickr.com/photos/1/", "body": "Again", "tags": [tag.id]}
+    response = async_to_sync(async_views.post_create_view)(
+        request("post", "/post/create/", data)
+    )
+    assert response.url == reverse("post", args=[shared.id])
+    assert Post.objects.count() == 1
+
+
+@pytest.fixture
+def shared_meanwhile(shared, settings, monkeypatch):
+    """Fixture to have the URL shared after the duplicate check, in ingest mode."""
+    settings.POSTS_ASYNC_INGEST = True
+    monkeypatch.setattr(Post.objects, "with_url", lambda url: Post.objects.none())
+
+
+def test_enqueue_race(client, shared_meanwhile, tag):
+    """Test a URL shared between the check and the save isn't a server error"""
+    data = {"url": "flickr.com/photos/1/", "body": "Again", "tags": [tag.id]}
+    response = client.post(reverse("post-create"), data)
+    assert response.url == reverse("home")
+    assert Post.objects.count() == 1
+
+
+def test_async_enqueue_race(shared_meanwhile, tag):
+    """Test the async create view handles the same race"""
+    data = {"url": "flickr.com/photos/1/", "body": "Again", "tags": [tag.id]}
+    response = async_to_sync(async_views.post_create_view)(
+        request("post", "/post/create/", data)
+    )
+    assert response.url == reverse("home")
+    assert Post.objects.count() == 1
+
+
+def test_old_duplicates_kept(shared, tag, client):
+    """Test reposts from before the key existed keep working without one"""
+    repost = make_post("https://flickr.com/photos/2/", title="Repost")
+    Post.objects.filter(pk=repost.pk).update(url="https://flickr.com/photos/1/", url_key=None)
+    Post.objects.update(url_key=None)
+
+    fill_url_keys(apps, None)
+    assert Post.objects.get(pk=shared.pk).url_key == url_key(shared.url)
+    assert Post.objects.get(pk=repost.pk).url_key is None
+
+    client.force_login(get_user_model().objects.create_user("lisa", "lisa@example.com", "pw"))
+    response = client.post(reverse("post-edit", args=[repost.id]), {"body": "Edited", "tags": [tag.id]})
+    assert response.status_code == 302
+    assert Post.objects.get(pk=repost.pk).url_key is None
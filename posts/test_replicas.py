@@ -0,0 +1,127 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import reverse
+
+from core.db import replica_databases
+
+from . import replicas
+from .models import Post
+from .replicas import PIN_COOKIE, ReplicaRouter, Routing
+
+
+@pytest.fixture(scope="module")
+def replica_db(django_db_setup, django_db_blocker, tmp_path_factory):
+    """Fixture to add a migrated SQLite database standing in for a replica."""
+    path = tmp_path_factory.mktemp("replica") / "replica.sqlite3"
+    connections.settings["replica"] = connections.configure_settings(
+        {
+            DEFAULT_DB_ALIAS: dict(connections[DEFAULT_DB_ALIAS].settings_dict),
+            "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path)},
+        }
+    )["replica"]
+    with django_db_blocker.unblock():
+        call_command("migrate", database="replica", verbosity=0)
+    yield
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+
+
+@pytest.fixture
+def replica(replica_db, settings):
+    """Fixture to send the feed's and post page's reads to the replica."""
+    settings.DATABASE_REPLICAS = ["replica"]
+    return "replica"
+
+
+def make_post(title, using=DEFAULT_DB_ALIAS):
+    return Post.objects.using(using).create(
+        title=title, image="https://example.com/image.jpg", body="Test content"
+    )
+
+
+@pytest.fixture
+def routing(settings):
+    """Fixture to route as if inside a request to a @replica_reads view."""
+    settings.DATABASE_REPLICAS = ["replica"]
+    routing = Routing()
+    routing.replica_reads = True
+    token = replicas._routing.set(routing)
+    yield routing
+    replicas._routing.reset(token)
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_feed_reads_replica(client, replica):
+    """Test the feed shows what the replica holds"""
+    make_post("On primary")
+    make_post("On replica", using=replica)
+
+    response = client.get(reverse("home"))
+    assert b"On replica" in response.content
+    assert b"On primary" not in response.content
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_post_page_reads_replica(client, replica):
+    """Test the post page looks the post up on the replica"""
+    post = make_post("On replica", using=replica)
+    assert client.get(reverse("post", args=[post.id])).status_code == 200
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_write_pins_client_to_primary(client, replica):
+    """Test a client reads its own writes after the redirect"""
+    post = make_post("On primary")
+    make_post("On replica", using=replica)
+    client.force_login(get_user_model().objects.create_user("lisa", "lisa@example.com", "pw"))
+
+    response = client.post(reverse("post-like", args=[post.id]))
+    assert response.cookies[PIN_COOKIE]["max-age"] == 10
+
+    response = client.get(reverse("home"))
+    assert b"On primary" in response.content
+    assert b"On replica" not in response.content
+
+
+def test_reads_after_write_use_primary(routing):
+    """Test a write in the request sends the rest of its reads to the primary"""
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) == "replica"
+    assert router.db_for_write(Post) == DEFAULT_DB_ALIAS
+    assert router.db_for_read(Post) is None
+    assert routing.wrote
+
+
+def test_other_views_read_primary(routing):
+    """Test only @replica_reads views read from replicas"""
+    routing.replica_reads = False
+    assert ReplicaRouter().db_for_read(Post) is None
+
+
+def test_no_replicas(routing, settings):
+    """Test reads stay on the primary when no replica is configured"""
+    settings.DATABASE_REPLICAS = []
+    assert ReplicaRouter().db_for_read(Post) is None
+
+
+def test_replica_settings():
+    """Test every DATABASE_REPLICA_<NAME>_URL becomes a replica mirrored in tests"""
+    databases = replica_databases(
+        {
+            "DATABASE_URL": "postgres://db/app",
+            "DATABASE_REPLICA_2_URL": "postgres://replica-2/app",
+            "DATABASE_REPLICA_1_URL": "postgres://replica-1/app",
+        },
+        mode="persistent",
+        pool_min_size=1,
+        pool_max_size=4,
+        pool_timeout=5,
+        max_age=600,
+    )
+    assert list(databases) == ["replica_1", "replica_2"]
+    assert databases["replica_1"]["HOST"] == "replica-1"
+    assert databases["replica_1"]["CONN_MAX_AGE"] == 600
+    assert databases["replica_1"]["TEST"] == {"MIRROR": "default"}
@@ -0,0 +1,108 @@
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+
+from . import scraper
+from .models import Post, Tag
+from .scrape_cache import DjangoScrapeCache, LocalScrapeCache, get_scrape_cache
+
+DATA = {
+    "image": "https://live.staticflickr.com/1/2_3_b.jpg",
+    "title": "Sunset",
+    "artist": "Jane Doe",
+}
+
+
+class Clock:
+    now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def local_cache():
+    """Fixture to provide a small cache with a clock we control."""
+    cache = LocalScrapeCache(ttl=60, max_entries=2)
+    cache.clock = Clock()
+    return cache
+
+
+def test_local_cache_hit_and_miss(local_cache):
+    """Test hits and misses are counted"""
+    assert local_cache.get("https://flickr.com/a") is None
+    local_cache.set("https://flickr.com/a", DATA)
+    assert local_cache.get("https://flickr.com/a") == DATA
+    assert local_cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_local_cache_ttl(local_cache):
+    """Test entries expire after the TTL"""
+    local_cache.set("https://flickr.com/a", DATA)
+    local_cache.clock.now = 61
+    assert local_cache.get("https://flickr.com/a") is None
+
+
+def test_local_cache_lru(local_cache):
+    """Test the least recently used entry goes first"""
+    local_cache.set("https://flickr.com/a", DATA)
+    local_cache.set("https://flickr.com/b", DATA)
+    local_cache.get("https://flickr.com/a")
+    local_cache.set("https://flickr.com/c", DATA)
+
+    assert local_cache.get("https://flickr.com/a") == DATA
+    assert local_cache.get("https://flickr.com/b") is None
+    assert local_cache.get("https://flickr.com/c") == DATA
+
+
+def test_django_cache_backend(settings):
+    """Test the shared backend round-trips through CACHES"""
+    cache = DjangoScrapeCache(ttl=60)
+    cache.clear()
+    assert cache.get("https://flickr.com/a") is None
+    cache.set("https://flickr.com/a", DATA)
+    assert cache.get("https://flickr.com/a") == DATA
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_django_cache_clear(settings):
+    """Test clearing forgets scraped pages only, in the cache every process shares"""
+    cache = DjangoScrapeCache(ttl=60)
+    assert cache.cache is caches["shared"]
+    caches["shared"].set("posts:other", 1)
+    cache.set("https://flickr.com/a", DATA)
+
+    cache.clear()
+    assert cache.get("https://flickr.com/a") is None
+    assert caches["shared"].get("posts:other") == 1
+
+
+@pytest.fixture
+def scrape_cache():
+    """Fixture to give a test the process-wide cache, empty, and empty it after."""
+    cache = get_scrape_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_repeat_submission_skips_network(client, db, scrape_cache, monkeypatch):
+    """Test the same URL posted twice is only fetched and saved once"""
+    fetched = []
+    monkeypatch.setattr(
+        scraper, "_fetch_post_data", lambda url: fetched.append(url) or DATA
+    )
+    tag = Tag.objects.create(name="Nature", slug="nature")
+    form_data = {
+        "url": "https://www.flickr.com/photos/sample",
+        "body": "Caption",
+        "tags": [tag.id],
+    }
+
+    for _ in range(2):
+        response = client.post(reverse("post-create"), data=form_data)
+        assert response.status_code == 302
+
+    assert fetched == ["https://www.flickr.com/photos/sample"]
+    # The second submission was turned away by Post.url_key before the cache
+    assert Post.objects.filter(image=DATA["image"]).count() == 1
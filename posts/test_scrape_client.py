@@ -0,0 +1,124 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from .scrape_client import ScrapeClient
+
+PAGE = b"<html><h1 class='photo-title'>Stub</h1></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.conditional.append(self.headers.get("If-None-Match"))
+        with self.server.in_flight_lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        threading.Event().wait(self.server.delay)
+        with self.server.in_flight_lock:
+            self.server.in_flight -= 1
+
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Fixture to run a keep-alive HTTP server on a free local port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.conditional = []
+    server.delay = 0
+    server.in_flight = server.max_in_flight = 0
+    server.in_flight_lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused(server):
+    """Test sequential requests share one keep-alive connection"""
+    client = ScrapeClient()
+    for i in range(5):
+        assert client.get(f"{server.url}/photos/{i}/", timeout=5).ok
+    assert server.connections == 1
+
+
+def test_conditional_request(server):
+    """Test a 304 hands back the body stored with the ETag"""
+    client = ScrapeClient()
+    first = client.get(f"{server.url}/photos/1/", timeout=5)
+    second = client.get(f"{server.url}/photos/1/", timeout=5)
+
+    assert server.conditional == [None, '"v1"']
+    assert second.status_code == 200
+    assert second.from_revalidation
+    assert second.content == first.content == PAGE
+
+
+def test_validators_are_bounded(server):
+    """Test the oldest stored pages are dropped past max_validators"""
+    client = ScrapeClient(max_validators=2)
+    for i in range(3):
+        client.get(f"{server.url}/photos/{i}/", timeout=5)
+    client.get(f"{server.url}/photos/0/", timeout=5)
+    assert server.conditional[-1] is None
+
+
+def test_per_host_limit(server):
+    """Test no more than per_host_limit requests run against a host at once"""
+    server.delay = 0.05
+    client = ScrapeClient(per_host_limit=2)
+    threads = [
+        threading.Thread(target=client.get, args=(f"{server.url}/photos/{i}/",))
+        for i in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert server.max_in_flight == 2
+
+
+def test_stream_early_stop(server):
+    """Test a half read stream stores the part read for revalidation"""
+    client = ScrapeClient()
+    with client.stream(f"{server.url}/photos/1/", chunk_size=8, timeout=5) as (response, body):
+        first = next(iter(body))
+
+    with client.stream(f"{server.url}/photos/1/", timeout=5) as (response, body):
+        assert response.from_revalidation
+        assert b"".join(body) == first
+
+    # A plain get needs the whole page, so it doesn't revalidate a partial one
+    assert client.get(f"{server.url}/photos/1/", timeout=5).content == PAGE
+    assert server.conditional == [None, '"v1"', None]
+
+
+def test_stream_keeps_connection(server):
+    """Test a short remainder is drained so the connection is reused"""
+    client = ScrapeClient()
+    for i in range(3):
+        with client.stream(f"{server.url}/photos/{i}/", chunk_size=8, timeout=5) as (response, body):
+            next(iter(body))
+    assert server.connections == 1
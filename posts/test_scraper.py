@@ -0,0 +1,63 @@
+import pytest
+
+from .scraper import ScrapeError, extract_post_data
+
+PAGE = """<!DOCTYPE html>
+<html><head>
+<meta name="description" content="A photo">
+<meta property="og:image" content="https://live.staticflickr.com/65535/1_2_b.jpg">
+<meta property="twitter:image" content="https://live.staticflickr.com/65535/9_9_b.jpg">
+</head><body>
+<h1 class="photo-title large"> Caf&eacute; <span>at night</span> </h1>
+<a class="owner-name truncate" href="/photos/jane/">Jane <b>Doe</b></a>
+<a class="owner-name" href="/photos/other/">Someone else</a>
+</body></html>
+"""
+
+
+def chunked(text, size):
+    raw = text.encode()
+    return [raw[i : i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_extract_post_data(size):
+    """Test fields come out the same however the page is split into chunks"""
+    assert extract_post_data(chunked(PAGE, size), "utf-8") == {
+        "image": "https://live.staticflickr.com/65535/1_2_b.jpg",
+        "title": "Café at night",
+        "artist": "Jane Doe",
+    }
+
+
+def test_extract_stops_when_done():
+    """Test nothing past the last wanted element is read"""
+    read = []
+
+    def chunks():
+        for chunk in chunked(PAGE, 16) + [b"<p>never needed</p>"] * 100:
+            read.append(chunk)
+            yield chunk
+
+    extract_post_data(chunks(), "utf-8")
+    assert b"<p>never needed</p>" not in read
+
+
+def test_extract_defaults():
+    """Test missing title and artist fall back like before"""
+    page = '<meta content="https://live.staticflickr.com/1_b.jpg">'
+    data = extract_post_data(chunked(page, 10))
+    assert data["title"] == "Untitled"
+    assert data["artist"] == "Unknown"
+
+
+def test_extract_without_image():
+    """Test a page without a Flickr image is rejected"""
+    with pytest.raises(ScrapeError):
+        extract_post_data(chunked("<h1 class='photo-title'>Hi</h1>", 10))
+
+
+def test_extract_unknown_encoding():
+    """Test a bogus charset header falls back to utf-8"""
+    data = extract_post_data(chunked(PAGE, 64), "no-such-charset")
+    assert data["title"] == "Café at night"
@@ -0,0 +1,92 @@
+import pytest
+from django.urls import reverse
+
+from . import search
+from .models import Post
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    """Fixture to give every test its own in-process index."""
+    monkeypatch.setattr(search, "_index", None)
+
+
+def make_post(title, artist="Someone", body="", tags=()):
+    post = Post.objects.create(
+        title=title, artist=artist, body=body, image="https://example.com/image.jpg"
+    )
+    post.tags.add(*tags)
+    return post
+
+
+def ids(posts):
+    return [str(post.id) for post in posts]
+
+
+def test_search_ranks_title_first(db):
+    """Test a title match outranks an artist match outranks a caption match"""
+    caption = make_post("Lake", body="a heron at dawn")
+    artist = make_post("Lake", artist="Heron Smith")
+    title = make_post("Heron in flight")
+
+    posts, _ = search.search_posts("heron")
+    assert ids(posts) == ids([title, artist, caption])
+
+
+def test_search_matches_all_terms(db):
+    """Test every word of the query has to match"""
+    both = make_post("Grey heron", body="by the lake")
+    make_post("Grey heron")
+
+    posts, _ = search.search_posts("Heron LAKE")
+    assert ids(posts) == ids([both])
+    assert search.search_posts("heron unicorn") == ([], None)
+
+
+def test_search_paginates(db):
+    """Test results page with cursors like the feed"""
+    for i in range(25):
+        make_post(f"Heron {i}")
+
+    seen = []
+    cursor = None
+    while True:
+        posts, cursor = search.search_posts("heron", cursor=cursor)
+        seen += posts
+        if not cursor:
+            break
+    assert len(seen) == len(set(ids(seen))) == 25
+
+
+def test_search_sees_edits_and_deletes(db):
+    """Test the index catches up with rows changed since the last search"""
+    post = make_post("Heron")
+    assert ids(search.search_posts("heron")[0]) == ids([post])
+
+    Post.objects.filter(pk=post.pk).update(title="Egret")
+    post.refresh_from_db()
+    post.save()  # bumps updated like any edit would
+    assert search.search_posts("heron")[0] == []
+    assert ids(search.search_posts("egret")[0]) == ids([post])
+
+    post.delete()
+    assert search.search_posts("egret")[0] == []
+
+
+def test_search_view(client, tag):
+    """Test the search endpoint and the category filter"""
+    tagged = make_post("Heron", tags=[tag])
+    make_post("Heron too")
+
+    response = client.get(reverse("search"), {"q": "heron"})
+    assert response.status_code == 200
+    assert len(response.context["posts"]) == 2
+
+    response = client.get(reverse("category", args=["nature"]), {"q": "heron"})
+    assert ids(response.context["posts"]) == ids([tagged])
+
+
+def test_search_view_invalid_cursor(client, db):
+    """Test a cursor from the plain feed doesn't crash a search"""
+    response = client.get(reverse("search"), {"q": "heron", "cursor": "WyJ4Il0"})
+    assert response.status_code == 404
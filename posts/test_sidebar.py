@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+from django.conf import settings
+from django.urls import reverse
+
+from .models import Tag
+from .sidebar import tag_generation
+
+
+def test_categories_are_cached(client, tag, django_assert_num_queries):
+    """Test only the first request pays for the categories query"""
+    client.get(reverse("home"))
+    # ETag stamps, the posts page and top posts, nothing to prefetch
+    with django_assert_num_queries(3):
+        response = client.get(reverse("home"))
+    assert response.context["categories"][0]["name"] == "Nature"
+
+
+def test_tag_change_refreshes_categories(
+    client, tag, django_capture_on_commit_callbacks
+):
+    """Test saving or deleting a tag shows up in the sidebar"""
+    client.get(reverse("home"))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Tag.objects.create(name="Urban", slug="urban")
+    names = [c["name"] for c in client.get(reverse("home")).context["categories"]]
+    assert names == ["Nature", "Urban"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.delete()
+    names = [c["name"] for c in client.get(reverse("home")).context["categories"]]
+    assert names == ["Urban"]
+
+
+def test_prerendered_sidebar(client, tag, settings, django_assert_num_queries):
+    """Test the prerender option serves the same categories as HTML"""
+    settings.POSTS_SIDEBAR_PRERENDER = True
+    client.get(reverse("category", args=["nature"]))
+
+    # ETag stamps, the posts page, the tag lookup and top posts
+    with django_assert_num_queries(4):
+        response = client.get(reverse("category", args=["nature"]))
+    html = response.content.decode()
+    assert '<li class="highlight">' in html
+    assert 'href="/category/nature"' in html
+
+
+def test_generation_shared_between_processes():
+    """Test a tag change made by another process, e.g. import_posts, is seen here"""
+    before = tag_generation()
+    bump = "from posts.sidebar import bump_tag_generation; bump_tag_generation()"
+    subprocess.run(
+        [sys.executable, "-c", f"import django; django.setup(); {bump}"],
+        cwd=settings.BASE_DIR,
+        check=True,
+    )
+    assert tag_generation() != before
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from . import scraper, scraping
+from .management.commands.profile_startup import PHASES, profile_startup
+
+# Generous, so a loaded CI box passes, but a heavy library imported at
+# startup again shows up in the module counts first
+STARTUP_BUDGET_MS = 1500
+SCRAPING_STACK = {"requests", "urllib3", "httpx", "bs4", "PIL"}
+
+
+@pytest.fixture(scope="module")
+def startup():
+    """Fixture to profile one cold start of the project."""
+    return profile_startup(os.environ["DJANGO_SETTINGS_MODULE"])
+
+
+def test_cold_start_skips_scraping_stack(startup):
+    """Test workers load the settings, apps, URLconf and middleware without scraping code"""
+    phases, imports = startup
+    assert list(phases) == list(PHASES)
+    loaded = {imported.module.split(".")[0] for imported in imports}
+    assert not loaded & SCRAPING_STACK
+    assert "posts.scraper" not in {imported.module for imported in imports}
+
+
+def test_cold_start_budget(startup):
+    """Test the URLconf stays light and the whole start within budget"""
+    phases, imports = startup
+    # 182 modules and 160ms+ while posts.views imported requests and httpx
+    assert sum(1 for imported in imports if imported.phase == "urlconf") < 100
+    assert sum(phases.values()) < STARTUP_BUDGET_MS
+
+
+def test_scraping_loads_on_use():
+    """Test names are looked up in the scraping stack when first used"""
+    assert scraping.ScrapeError is scraper.ScrapeError
+    assert scraping.RequestException.__module__ == "requests.exceptions"
+    with pytest.raises(AttributeError):
+        scraping.BeautifulSoup
@@ -0,0 +1,90 @@
+import io
+
+from django.core.management import call_command
+
+from .models import Post, Tag
+from .tag_stats import recount_tags
+
+
+def make_post(title):
+    return Post.objects.create(title=title, image="https://example.com/image.jpg", body="")
+
+
+def stats(tag):
+    tag.refresh_from_db()
+    return tag.post_count, tag.latest_post_id
+
+
+def test_add_and_remove(tags):
+    """Test tagging from either side moves the count and latest post"""
+    nature, urban = tags
+    old, new = make_post("Old"), make_post("New")
+
+    old.tags.add(nature, urban)
+    nature.post_set.add(new)
+    assert stats(nature) == (2, new.id)
+    assert stats(urban) == (1, old.id)
+
+    nature.post_set.remove(new, new)
+    new.tags.remove(urban)  # never tagged, changes nothing
+    assert stats(nature) == (1, old.id)
+    assert stats(urban) == (1, old.id)
+
+    old.tags.clear()
+    assert stats(nature) == (0, None)
+    assert stats(urban) == (0, None)
+
+
+def test_reverse_clear(tags):
+    """Test emptying a tag from its side"""
+    nature, _ = tags
+    nature.post_set.add(make_post("One"), make_post("Two"))
+    nature.post_set.clear()
+    assert stats(nature) == (0, None)
+
+
+def test_delete_post(tags):
+    """Test deleting the latest post falls back to the one before"""
+    nature, _ = tags
+    old, new = make_post("Old"), make_post("New")
+    nature.post_set.add(old, new)
+
+    new.delete()
+    assert stats(nature) == (1, old.id)
+    Post.objects.all().delete()
+    assert stats(nature) == (0, None)
+
+
+def test_remove_with_drifted_count(tags):
+    """Test untagging when the counter drifted low stops at 0 instead of failing"""
+    nature, _ = tags
+    one, two = make_post("One"), make_post("Two")
+    nature.post_set.add(one, two)
+    Tag.objects.update(post_count=1)
+
+    nature.post_set.remove(one, two)
+    assert stats(nature) == (0, None)
+
+
+def test_recount_tags(tags):
+    """Test the command repairs counters that drifted"""
+    nature, urban = tags
+    post = make_post("One")
+    post.tags.add(nature)
+    Tag.objects.update(post_count=7, latest_post=None)
+
+    out = io.StringIO()
+    call_command("recount_tags", stdout=out)
+
+    assert "Recounted 2 tag(s), 2 had drifted" in out.getvalue()
+    assert stats(nature) == (1, post.id)
+    assert stats(urban) == (0, None)
+    assert recount_tags([nature.id]) == 1
+
+
+def test_sidebar_shows_counts(client, tags, django_capture_on_commit_callbacks):
+    """Test the categories list the post count"""
+    with django_capture_on_commit_callbacks(execute=True):
+        make_post("One").tags.add(tags[0])
+    categories = client.get("/").context["categories"]
+    assert {c["slug"]: c["post_count"] for c in categories} == {"nature": 1, "urban": 0}
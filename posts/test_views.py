@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.test import Client
 from .models import Post, Tag
 from .forms import PostCreateForm, PostEditForm
+from .pagination import encode_cursor
 
 @pytest.fixture
 def client():
@@ -154,3 +155,80 @@ def test_post_delete_view(client, post_with_tag):
 
     # Ensure the post no longer exists
     assert not Post.objects.filter(id=post_with_tag.id).exists()
+
+# Pagination Tests
+@pytest.fixture
+def many_posts(db, tag):
+    """Fixture to create more posts than fit on one feed page."""
+    posts = []
+    for i in range(25):
+        post = Post.objects.create(
+            title=f"Post {i}",
+            artist="Jane Doe",
+            url=f"https://example.com/{i}",
+            image="https://example.com/image.jpg",
+            body="Test content",
+        )
+        post.tags.add(tag)
+        posts.append(post)
+    return posts
+
+def test_home_view_paginates(client, many_posts):
+    """Test the feed walks every post exactly once, newest first"""
+    seen = []
+    response = client.get(reverse("home"))
+    while True:
+        assert response.status_code == 200
+        assert len(response.context["posts"]) <= 10
+        seen += [p.id for p in response.context["posts"]]
+        cursor = response.context["next_cursor"]
+        if not cursor:
+            break
+        response = client.get(reverse("home"), {"cursor": cursor})
+
+    expected = Post.objects.order_by("-created", "-id").values_list("id", flat=True)
+    assert seen == list(expected)
+
+def test_category_view_paginates(client, many_posts):
+    """Test the category feed carries the cursor in the query string"""
+    response = client.get(reverse("category", args=["nature"]))
+    cursor = response.context["next_cursor"]
+    assert f"?cursor={cursor}" in response.content.decode()
+
+    response = client.get(reverse("category", args=["nature"]), {"cursor": cursor})
+    assert len(response.context["posts"]) == 10
+
+def test_home_view_partial(client, many_posts):
+    """Test infinite scroll requests get the feed fragment only"""
+    response = client.get(reverse("home"), headers={"HX-Request": "true"})
+    assert response.status_code == 200
+    assert [t.name for t in response.templates][0] == "posts/partials/feed.html"
+    assert "layouts/a.html" not in [t.name for t in response.templates]
+
+@pytest.mark.parametrize(
+    "cursor", ["not-a-cursor", encode_cursor([1, 2]), encode_cursor([None, None])]
+)
+def test_home_view_invalid_cursor(client, db, cursor):
+    """Test a garbled or wrongly typed cursor is a 404, not a server error"""
+    response = client.get(reverse("home"), {"cursor": cursor})
+    assert response.status_code == 404
+
+# Query Count Tests
+@pytest.mark.parametrize("count", [1, 10])
+def test_home_view_query_count(client, tag, count, django_assert_num_queries):
+    """Test the feed query count does not grow with the number of posts"""
+    for i in range(count):
+        post = Post.objects.create(title=f"Post {i}", image="https://example.com/image.jpg")
+        post.tags.add(tag)
+
+    # ETag stamps, posts page, tags for the page, sidebar categories, top posts
+    with django_assert_num_queries(5):
+        response = client.get(reverse("home"))
+    assert len(response.context["posts"]) == count
+
+def test_category_view_query_count(client, many_posts, django_assert_num_queries):
+    """Test a full category page costs the same handful of queries"""
+    # ETag stamps, posts page, tag lookup, page's tags, categories, top posts
+    with django_assert_num_queries(6):
+        response = client.get(reverse("category", args=["nature"]))
+    assert len(response.context["posts"]) == 10
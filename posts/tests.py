@@ -2,7 +2,6 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from .models import Post, Tag
 from .forms import PostCreateForm, PostEditForm
-import uuid
 
 class PostModelTest(TestCase):
     def setUp(self):
@@ -83,7 +82,7 @@ class PostViewsTest(TestCase):
         response = self.client.get(reverse("post", args=[self.post.id]))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "posts/post_page.html")
-        self.assertEqual(uuid.UUID(response.context["post"].id), self.post.id)
+        self.assertEqual(response.context["post"].id, self.post.id)
         self.assertEqual(str(response.context["post"].id), str(self.post.id))
 
 
@@ -1,23 +1,108 @@
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
-import requests
-from bs4 import BeautifulSoup
-from .forms import PostCreateForm, PostEditForm
-from .models import Post, Tag
+from django.views.decorators.http import require_POST
+from . import scraping
+from .api import InvalidQuery, api_response, parse_query, select, serialize
+from .bulk import run_bulk_action
+from .comments import COMMENT_ORDERINGS, comment_page
+from .forms import (
+    BulkPostsForm,
+    CommentCreateForm,
+    PostCreateForm,
+    PostEditForm,
+    ReplyCreateForm,
+)
+from .http_cache import conditional, feed_etag, post_etag
+from .images import IMAGE_VARIANTS, ImageError, get_image_cache, image_etag
+from .jobs import enqueue_scrape
+from .likes import toggle_like
+from .models import Comment, Post, Tag
+from .pagination import InvalidCursor, paginate
+from .perf import connection_stats, get_stats, perf_settings
+from .replicas import replica_reads
+from .search import search_posts
+from .sidebar import sidebar_context
 from django.contrib import messages
-from requests.exceptions import RequestException
 
 
+@replica_reads
+@conditional(feed_etag)
 def home_view(request, tag=None):
+    q = request.GET.get("q", "").strip()
+    cursor = request.GET.get("cursor")
     if tag:
-        posts = Post.objects.filter(tags__slug=tag)
         tag = get_object_or_404(Tag, slug=tag)
-    else:
-        posts = Post.objects.all()
-    categories = Tag.objects.all()
-    context = {"posts": posts, "categories": categories, "tag": tag}
+
+    try:
+        if q:
+            posts, next_cursor = search_posts(q, tag and tag.slug, cursor)
+        elif tag:
+            # By id, so the query stays on posts_post_tags without joining posts_tag
+            posts, next_cursor = paginate(Post.objects.feed().filter(tags=tag), cursor)
+        else:
+            posts, next_cursor = paginate(Post.objects.feed(), cursor)
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+
+    context = {"posts": posts, "next_cursor": next_cursor, "tag": tag, "q": q}
+
+    # Infinite scroll asks for the next page only, without the layout around it
+    if request.headers.get("HX-Request"):
+        return render(request, "posts/partials/feed.html", context)
+
+    context.update(sidebar_context(tag))
     return render(request, "posts/home.html", context)
 
 
+@replica_reads
+@conditional(feed_etag)
+def api_feed_view(request, tag=None):
+    try:
+        fields, expand = parse_query(request)
+    except InvalidQuery as e:
+        return api_response({"error": str(e)}, status=400)
+
+    posts = Post.objects.all()
+    if tag:
+        tag = Tag.objects.filter(slug=tag).first()
+        if tag is None:
+            return api_response({"error": "No such category"}, status=404)
+        posts = posts.filter(tags=tag)
+
+    try:
+        posts, next_cursor = paginate(select(posts, fields, expand), request.GET.get("cursor"))
+    except InvalidCursor:
+        return api_response({"error": "Invalid cursor"}, status=400)
+
+    return api_response(
+        {
+            "posts": [serialize(post, fields, expand) for post in posts],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+@replica_reads
+@conditional(post_etag)
+def api_post_view(request, pk):
+    try:
+        fields, expand = parse_query(request)
+    except InvalidQuery as e:
+        return api_response({"error": str(e)}, status=400)
+
+    post = select(Post.objects.filter(id=pk), fields, expand).first()
+    if post is None:
+        return api_response({"error": "No such post"}, status=404)
+    return api_response(serialize(post, fields, expand))
+
+
 # def post_create_view(request):
 #     form = PostCreateForm()
 
@@ -62,31 +147,29 @@ def post_create_view(request):
             post = form.save(commit=False)
             url = form.cleaned_data.get("url")  # Get cleaned user input
 
-            try:
-                website = requests.get(
-                    url, timeout=5
-                )  # Set timeout to prevent slow requests
-                website.raise_for_status()  # Raise error for bad responses (e.g., 404, 500)
-
-                sourcecode = BeautifulSoup(website.text, "html.parser")
-
-                # Extract image
-                find_image = sourcecode.select(
-                    'meta[content^="https://live.staticflickr.com/"]'
-                )
-                if not find_image:
-                    messages.error(request, "No valid image found on the page.")
-                    return render(request, "posts/post_create.html", {"form": form})
-
-                post.image = find_image[0]["content"]
-
-                # Extract title
-                find_title = sourcecode.select("h1.photo-title")
-                post.title = find_title[0].text.strip() if find_title else "Untitled"
+            # A repost costs an index lookup, not a fetch from Flickr
+            duplicate = Post.objects.with_url(url).only("id").first()
+            if duplicate is not None:
+                messages.info(request, "This post has already been shared.")
+                return redirect("post", duplicate.id)
+
+            # Background ingestion: save now, let run_scrape_worker fill it in
+            if getattr(settings, "POSTS_ASYNC_INGEST", False):
+                try:
+                    with transaction.atomic():
+                        enqueue_scrape(post)
+                        form.save_m2m()
+                except IntegrityError:  # Shared by someone else since the check
+                    messages.info(request, "This post has already been shared.")
+                    return redirect("home")
+                messages.success(request, "Post created, fetching the image ...")
+                return redirect("home")
 
-                # Extract artist
-                find_artist = sourcecode.select("a.owner-name")
-                post.artist = find_artist[0].text.strip() if find_artist else "Unknown"
+            try:
+                data = scraping.scrape_post_data(url)
+                post.image = data["image"]
+                post.title = data["title"]
+                post.artist = data["artist"]
 
                 post.save()
                 form.save_m2m()
@@ -94,7 +177,12 @@ def post_create_view(request):
                 messages.success(request, "Post created successfully!")
                 return redirect("home")
 
-            except RequestException as e:  # Handles network issues, 404 errors, etc.
+            except IntegrityError:  # Shared by someone else while we were fetching it
+                messages.info(request, "This post has already been shared.")
+                return redirect("home")
+            except scraping.ScrapeError as e:  # Page has no Flickr image
+                messages.error(request, str(e))
+            except scraping.RequestException as e:  # Handles network issues, 404 errors, etc.
                 messages.error(request, f"Error fetching data: {str(e)}")
             except IndexError:  # Handles missing elements on the page
                 messages.error(request, "Error extracting data from the URL.")
@@ -109,6 +197,52 @@ def post_create_view(request):
     return render(request, "posts/post_create.html", {"form": form})
 
 
+def post_status_view(request, pk):
+    """Polled by pending post cards until the worker has filled them in"""
+    post = get_object_or_404(Post, id=pk)
+    return JsonResponse(
+        {
+            "status": post.status,
+            "title": post.title,
+            "artist": post.artist,
+            "image": post.image,
+        }
+    )
+
+
+@login_required
+@require_POST
+def post_like_view(request, pk):
+    post = toggle_like(request.user, get_object_or_404(Post, id=pk))
+    # The like button swaps in the re-rendered card
+    if request.headers.get("HX-Request"):
+        return render(request, "posts/post.html", {"post": post})
+    return redirect("post", pk)
+
+
+def post_image_view(request, pk, variant):
+    """The post's Flickr image, served from the local disk cache"""
+    if variant not in IMAGE_VARIANTS and variant != "original":
+        raise Http404("Unknown image variant")
+    post = get_object_or_404(Post.objects.only("id", "image"), id=pk)
+    if not post.image:  # still pending
+        raise Http404("No image yet")
+
+    etag = image_etag(post.image, variant)
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            path, content_type = get_image_cache().get(post.id, post.image, variant)
+        # Flickr is down or sent something unreadable, let the browser try it directly
+        except (scraping.RequestException, ImageError):
+            return redirect(post.image)
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 def post_delete_view(request, pk):
     post = get_object_or_404(Post, id=pk)
 
@@ -121,6 +255,29 @@ def post_delete_view(request, pk):
     return render(request, "posts/post_delete.html", context)
 
 
+@require_POST
+def bulk_posts_view(request):
+    """
+    Staff only. Takes {"action": "delete" | "add_tag" | "remove_tag",
+    "posts": [post ids], "tag": tag slug} and answers how many posts changed.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff only"}, status=403)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Expected a JSON object"}, status=400)
+
+    form = BulkPostsForm(data)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    action = form.cleaned_data["action"]
+    changed = run_bulk_action(action, form.cleaned_data["posts"], form.cleaned_data["tag"])
+    return JsonResponse({"action": action, "posts": changed})
+
+
 def post_edit_view(request, pk):
     post = get_object_or_404(Post, id=pk)
 
@@ -137,8 +294,74 @@ def post_edit_view(request, pk):
     return render(request, "posts/post_edit.html", context)
 
 
+@replica_reads
+@conditional(post_etag)
 def post_page_view(request, pk):
-    # post = Post.objects.all(id=pk)
-    post = get_object_or_404(Post, id=pk)
-    context = {"post": post}
+    post = get_object_or_404(Post.objects.feed(), id=pk)
+    sort = request.GET.get("sort")
+    if sort not in COMMENT_ORDERINGS:
+        sort = "newest"
+
+    try:
+        comments, next_cursor = comment_page(post, sort, request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+
+    context = {
+        "post": post,
+        "comments": comments,
+        "next_cursor": next_cursor,
+        "sort": sort,
+        "comment_form": CommentCreateForm(),
+        "reply_form": ReplyCreateForm(),
+    }
+    # Tabs and "Load more" swap in just the comment list
+    if request.headers.get("HX-Request"):
+        return render(request, "posts/partials/comments.html", context)
     return render(request, "posts/post_page.html", context)
+
+
+@login_required
+@require_POST
+def comment_create_view(request, pk):
+    post = get_object_or_404(Post, id=pk)
+    form = CommentCreateForm(request.POST)
+    if form.is_valid():
+        comment = form.save(commit=False)
+        comment.post = post
+        comment.author = request.user
+        comment.save()
+    else:
+        messages.error(request, "Comments need 1 to 150 characters.")
+    return redirect("post", post.id)
+
+
+@login_required
+@require_POST
+def reply_create_view(request, pk):
+    comment = get_object_or_404(Comment, id=pk)
+    form = ReplyCreateForm(request.POST)
+    if form.is_valid():
+        reply = form.save(commit=False)
+        reply.comment = comment
+        reply.author = request.user
+        reply.save()
+    else:
+        messages.error(request, "Replies need 1 to 150 characters.")
+    return redirect("post", comment.post_id)
+
+
+@staff_member_required
+def perf_stats_view(request):
+    """Sampled request percentiles and connection pool counters of this process"""
+    return render(
+        request,
+        "admin/perf_stats.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Request performance",
+            "rows": get_stats().summary(),
+            "sample_rate": perf_settings()["SAMPLE_RATE"],
+            "databases": connection_stats(),
+        },
+    )